@@ -0,0 +1,240 @@
+import json
+import multiprocessing
+import os
+import time
+from collections import deque
+
+import pandas as pd
+
+from data_processing_workflow import analyze_condition, get_condition_files
+from helper import RecordingLoadError, print_batch_report, print_overall_summary, print_statistical_results
+from plotter import plot_group_results
+from processing import PipelineWorkspace
+from quality import filter_by_quality
+from statistic_test import perform_paired_ttest
+
+
+class RecordingProcessingError(Exception):
+    """Raised when feature extraction fails on a recording that loaded correctly."""
+
+
+class RecordingTimeoutError(Exception):
+    """Raised when a recording takes longer than the per-recording timeout."""
+
+
+_worker_workspace = None
+
+
+def process_recording_task(subject, condition, filepath):
+    """
+    Worker entry point: extract the summary row for one recording.
+
+    Each worker process keeps one ``PipelineWorkspace`` for all recordings it processes.
+    """
+    global _worker_workspace
+    if _worker_workspace is None:
+        _worker_workspace = PipelineWorkspace()
+    try:
+        return analyze_condition(subject, condition, filepath, _worker_workspace)[0]
+    except RecordingLoadError:
+        raise
+    except Exception as e:
+        raise RecordingProcessingError(f"{type(e).__name__}: {e}") from None
+
+
+def recording_key(subject, condition):
+    return f"{subject}|{condition}"
+
+
+class BatchRunner:
+    """
+    Fault-tolerant runner for a list of ``(subject, condition, filepath)`` recordings.
+
+    Every recording runs in a worker process with a timeout. Load errors (missing or
+    malformed files) are permanent and quarantine the recording immediately; processing
+    errors and timeouts are retried up to ``max_retries`` times before quarantine.
+    Each outcome is appended to a JSON-lines checkpoint as soon as it is known, so a
+    crashed or interrupted run started again with the same checkpoint only processes
+    what is left.
+
+    Parameters
+    ----------
+    checkpoint_path : str
+        JSON-lines file holding completed records and quarantined recordings
+    workers : int
+        Number of worker processes
+    timeout : float
+        Per-recording time limit in seconds
+    max_retries : int
+        Extra attempts for recordings that failed with a processing error or timeout
+    retry_quarantined : bool
+        Give recordings quarantined by an earlier run another chance
+    """
+
+    def __init__(self, checkpoint_path, workers=1, timeout=120.0, max_retries=2,
+                 retry_quarantined=False, poll_interval=0.05):
+        self.checkpoint_path = checkpoint_path
+        self.workers = workers
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.retry_quarantined = retry_quarantined
+        self.poll_interval = poll_interval
+
+    def load_checkpoint(self):
+        """Return completed records and quarantine entries found in the checkpoint, keyed by recording."""
+        completed = {}
+        quarantined = {}
+        if not os.path.exists(self.checkpoint_path):
+            return completed, quarantined
+
+        with open(self.checkpoint_path) as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # A run killed mid-write leaves at most one truncated line
+                    continue
+                if entry['status'] == 'done':
+                    completed[entry['key']] = entry['record']
+                    quarantined.pop(entry['key'], None)
+                else:
+                    quarantined[entry['key']] = entry
+        return completed, quarantined
+
+    def run(self, tasks):
+        """
+        Process ``tasks`` and return a report.
+
+        Returns
+        -------
+        report : dict
+            records (all completed rows, including resumed ones), quarantined
+            (one entry per skipped recording with the reason), n_resumed, n_processed
+        """
+        completed, quarantined = self.load_checkpoint()
+        if self.retry_quarantined:
+            quarantined = {}
+        task_keys = {recording_key(*task[:2]) for task in tasks}
+        n_resumed = len(task_keys & completed.keys())
+
+        pending = deque(task for task in tasks
+                        if recording_key(*task[:2]) not in completed
+                        and recording_key(*task[:2]) not in quarantined)
+        attempts = {}
+        in_flight = {}
+
+        checkpoint = open(self.checkpoint_path, 'a')
+
+        def record_outcome(entry):
+            checkpoint.write(json.dumps(entry) + "\n")
+            checkpoint.flush()
+            os.fsync(checkpoint.fileno())
+
+        def fail(task, error, permanent=False):
+            key = recording_key(*task[:2])
+            if not permanent and attempts[key] <= self.max_retries:
+                pending.append(task)
+                return
+            entry = {
+                'status': 'quarantined',
+                'key': key,
+                'subject': task[0],
+                'condition': task[1],
+                'filepath': task[2],
+                'error_type': type(error).__name__,
+                'reason': str(error),
+                'attempts': attempts[key]
+            }
+            quarantined[key] = entry
+            record_outcome(entry)
+
+        pool = multiprocessing.Pool(self.workers)
+        try:
+            while pending or in_flight:
+                while pending and len(in_flight) < self.workers:
+                    task = pending.popleft()
+                    key = recording_key(*task[:2])
+                    attempts[key] = attempts.get(key, 0) + 1
+                    in_flight[key] = (task, pool.apply_async(process_recording_task, task), time.monotonic())
+
+                next(iter(in_flight.values()))[1].wait(self.poll_interval)
+                now = time.monotonic()
+                timed_out = []
+
+                for key, (task, result, started) in list(in_flight.items()):
+                    if result.ready():
+                        del in_flight[key]
+                        try:
+                            record = result.get()
+                        except RecordingLoadError as e:
+                            fail(task, e, permanent=True)
+                        except Exception as e:
+                            fail(task, e)
+                        else:
+                            completed[key] = record
+                            record_outcome({'status': 'done', 'key': key, 'record': record})
+                    elif now - started > self.timeout:
+                        timed_out.append(key)
+
+                if timed_out:
+                    # A stuck worker cannot be cancelled on its own: replace the pool and
+                    # resubmit the innocent in-flight recordings without charging an attempt
+                    pool.terminate()
+                    pool = multiprocessing.Pool(self.workers)
+                    for key in timed_out:
+                        task = in_flight.pop(key)[0]
+                        fail(task, RecordingTimeoutError(f"No result after {self.timeout:.1f} s"))
+                    for key, (task, _, _) in in_flight.items():
+                        attempts[key] -= 1
+                        pending.appendleft(task)
+                    in_flight.clear()
+        finally:
+            pool.terminate()
+            checkpoint.close()
+
+        keys = [recording_key(*task[:2]) for task in tasks]
+        n_completed = sum(key in completed for key in keys)
+        return {
+            'records': [completed[key] for key in keys if key in completed],
+            'quarantined': [quarantined[key] for key in keys if key in quarantined],
+            'n_resumed': n_resumed,
+            'n_processed': n_completed - n_resumed
+        }
+
+
+def run_cohort_batch(subjects, data_dir, checkpoint_path, plot_results=False, min_quality=None,
+                     **runner_params):
+    """
+    Fault-tolerant counterpart of ``analyze_all_subjects``.
+
+    Missing or broken recordings are quarantined and listed in the report instead of
+    stopping the run; the paired t-tests use whatever pairs completed and, with
+    ``min_quality`` set, passed the quality filter.
+
+    Returns
+    -------
+    all_results_df : DataFrame
+        One row per completed recording
+    ttest_results : dict
+        Output of ``perform_paired_ttest``
+    report : dict
+        Output of ``BatchRunner.run``
+    """
+    tasks = [(subject, condition, filepath)
+             for subject in subjects
+             for condition, filepath in get_condition_files(subject, data_dir).items()]
+
+    report = BatchRunner(checkpoint_path, **runner_params).run(tasks)
+
+    all_results_df = pd.DataFrame(report['records'])
+    if min_quality is not None and len(all_results_df):
+        all_results_df = filter_by_quality(all_results_df, min_quality)
+    ttest_results = perform_paired_ttest(all_results_df) if len(all_results_df) else {}
+
+    print_batch_report(report)
+    if plot_results:
+        print_overall_summary(all_results_df)
+        print_statistical_results(ttest_results, all_results_df)
+        plot_group_results(all_results_df, ttest_results)
+
+    return all_results_df, ttest_results, report
@@ -1,8 +1,11 @@
 import os.path
+import re
 from helper import *
 from plotter import *
 from processing import *
-from statistic_test import perform_paired_ttest
+from statistic_test import perform_paired_ttest, perform_weighted_paired_ttest
+from features import TREMOR_FEATURES
+from quality import assess_signal_quality, filter_by_quality
 
 
 def analyze_recording(filepath, axis='atotal', plot_results=True):
@@ -40,15 +43,79 @@ def analyze_recording(filepath, axis='atotal', plot_results=True):
     return features, processed
 
 
-def analyze_subject(subject_name, data_dir=".//data//", plot_results=True):
-    """Analyze all four conditions for a single subject."""
-    conditions = {
+def get_condition_files(subject_name, data_dir):
+    """Map each of the four conditions of a subject to its recording file."""
+    return {
         'rest': f'{data_dir}{subject_name} rest.csv',
         'post': f'{data_dir}{subject_name} post.csv',
         'fat_rest': f'{data_dir}{subject_name} fat rest.csv',
         'fat_post': f'{data_dir}{subject_name} fat post.csv'
     }
 
+
+def discover_subjects(data_dir):
+    """List subjects with at least one recording named ``<Subject> [fat ](rest|post).csv`` in data_dir."""
+    pattern = re.compile(r'^(.+?) (?:fat )?(?:rest|post)\.csv$')
+    matches = (pattern.match(name) for name in os.listdir(data_dir))
+    return sorted({match.group(1) for match in matches if match})
+
+
+def analyze_condition(subject_name, condition, filepath, workspace=None, target_fs=None):
+    """
+    Extract the summary feature row for one recording of a subject.
+
+    Returns the row together with the time axis, raw and processed signals and the PSD,
+    which callers may keep for plotting or drop straight away. Pass a
+    ``PipelineWorkspace`` to reuse buffers across calls; the returned signals and PSD are
+    then views into it that the next call overwrites. The row also carries jackknife
+    standard errors and confidence intervals of the band powers. ``target_fs``
+    decimates the recording to that analysis rate before the bandpass filter; the
+    returned time axis and raw signal are then decimated to the same rate, so all three
+    signals share one time axis.
+    """
+    df = load_accelerometer_data(filepath)
+    quality = assess_signal_quality(df)
+    fs = get_sampling_rate(df)
+    signal_data, time = extract_signal(df, 'atotal')
+
+    features, freqs_fft, fft_mag, freqs_psd, psd, processed, artifact_mask = extract_tremor_features(
+        signal_data, fs,
+        artifact_params={'k': 1.5},
+        denoise_params={'window_size': 51, 'threshold_scale': 0.5, 'blend_factor': 0.3},
+        workspace=workspace,
+        uncertainty_params={'method': 'jackknife'},
+        target_fs=target_fs
+    )
+
+    row = {
+        'subject': subject_name,
+        'condition': condition,
+        'rms': features['rms'],
+        'peak_frequency': features['peak_frequency'],
+        'band_power_8_12': features['band_power_8_12'],
+        'band_power_3_8': features['band_power_3_8'],
+        'relative_power_8_12': features['relative_power_8_12'],
+        'total_power': features['total_power'],
+        'fs': fs,
+        'duration': df['time'].iloc[-1] - df['time'].iloc[0],
+        'n_samples': len(df)
+    }
+    row.update({name: features[name] for name in TREMOR_FEATURES if name not in row})
+    row.update({name: value for name, value in features.items() if name.endswith(('_se', '_ci_low', '_ci_high'))})
+    row.update(quality)
+
+    down = decimation_factor(fs, target_fs)
+    if down > 1:
+        # resample_poly keeps every down-th sample position, so the time axis is subsampled
+        signal_data, _ = decimate_signal(signal_data, fs, target_fs)
+        time = time[::down]
+    return row, time, signal_data, processed, freqs_psd, psd
+
+
+def analyze_subject(subject_name, data_dir=".//data//", plot_results=True):
+    """Analyze all four conditions for a single subject."""
+    conditions = get_condition_files(subject_name, data_dir)
+
     results = {}
     raw_data = {}
     processed_signals = {}
@@ -57,29 +124,8 @@ def analyze_subject(subject_name, data_dir=".//data//", plot_results=True):
     # Process data for each condition
     for condition, filepath in conditions.items():
         try:
-            df = load_accelerometer_data(filepath)
-            fs = get_sampling_rate(df)
-            signal_data, time = extract_signal(df, 'atotal')
-
-            features, freqs_fft, fft_mag, freqs_psd, psd, processed, artifact_mask = extract_tremor_features(
-                signal_data, fs,
-                artifact_params={'k': 1.5},
-                denoise_params={'window_size': 51, 'threshold_scale': 0.5, 'blend_factor': 0.3}
-            )
-
-            results[condition] = {
-                'subject': subject_name,
-                'condition': condition,
-                'rms': features['rms'],
-                'peak_frequency': features['peak_frequency'],
-                'band_power_8_12': features['band_power_8_12'],
-                'band_power_3_8': features['band_power_3_8'],
-                'relative_power_8_12': features['relative_power_8_12'],
-                'total_power': features['total_power'],
-                'fs': fs,
-                'duration': df['time'].iloc[-1] - df['time'].iloc[0],
-                'n_samples': len(df)
-            }
+            row, time, signal_data, processed, freqs_psd, psd = analyze_condition(subject_name, condition, filepath)
+            results[condition] = row
             raw_data[condition] = {'time': time, 'signal': signal_data}
             processed_signals[condition] = {'time': time, 'signal': processed}
             psd_data[condition] = {'freqs': freqs_psd, 'psd': psd}
@@ -95,22 +141,39 @@ def analyze_subject(subject_name, data_dir=".//data//", plot_results=True):
     return results, raw_data, processed_signals, psd_data
 
 
-def analyze_all_subjects(subjects, data_dir):
-    """Aggregate  and analyze data from all subjects."""
+def analyze_all_subjects(subjects, data_dir, plot_results=True, min_quality=None, weighted=False):
+    """
+    Aggregate  and analyze data from all subjects.
+
+    With ``min_quality`` set, recordings scoring below it are left out of the statistics.
+    With ``weighted`` set, band-power comparisons use ``perform_weighted_paired_ttest``.
+    Only the feature rows are kept, so all recordings share one ``PipelineWorkspace``.
+    """
     all_results = []
+    workspace = PipelineWorkspace()
 
     for subject in subjects:
-        results, _, _, _ = analyze_subject(subject, data_dir, False)
-        for cond, data in results.items():
-            all_results.append(data)
+        for condition, filepath in get_condition_files(subject, data_dir).items():
+            try:
+                all_results.append(analyze_condition(subject, condition, filepath, workspace)[0])
+            except Exception as e:
+                print(f"Error processing {condition}: {e}")
 
     all_results_df = pd.DataFrame(all_results)
-    print_overall_summary(all_results_df)
+    if min_quality is not None:
+        all_results_df = filter_by_quality(all_results_df, min_quality)
 
     # Perform statistical analysis
-    ttest_results = perform_paired_ttest(all_results_df)
-    print_statistical_results(ttest_results, all_results_df)
-    plot_group_results(all_results_df, ttest_results)
+    if weighted:
+        ttest_results = perform_weighted_paired_ttest(all_results_df)
+    else:
+        ttest_results = perform_paired_ttest(all_results_df)
+
+    # Show summary and plots
+    if plot_results:
+        print_overall_summary(all_results_df)
+        print_statistical_results(ttest_results, all_results_df)
+        plot_group_results(all_results_df, ttest_results)
 
     return all_results_df, ttest_results
 
@@ -0,0 +1,300 @@
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import socket
+import threading
+import time
+from collections import deque
+
+import pandas as pd
+
+from data_processing_workflow import analyze_condition, discover_subjects, get_condition_files
+from helper import print_statistical_results
+from processing import PipelineWorkspace
+from statistic_test import perform_paired_ttest
+
+QUEUE_DIRS = ['pending', 'leased', 'done', 'failed', 'shards']
+
+
+def _write_atomic(path, text):
+    """Write a file under a temporary name and rename it into place."""
+    tmp_path = f"{path}.tmp-{socket.gethostname()}-{os.getpid()}"
+    with open(tmp_path, 'w') as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.rename(tmp_path, path)
+
+
+def init_queue(queue_dir, data_dir, subjects=None):
+    """
+    Create a work queue on shared storage with one task file per recording.
+
+    Layout: ``pending/`` holds unclaimed tasks, ``leased/`` tasks a worker is processing
+    (file name suffixed with ``@<worker>``, mtime = last heartbeat), ``done/`` and
+    ``failed/`` finished tasks and ``shards/`` the partial feature tables.
+    """
+    for name in QUEUE_DIRS:
+        os.makedirs(os.path.join(queue_dir, name), exist_ok=True)
+    if any(queue_status(queue_dir).values()):
+        # Task names restart at 0, so initialising again would overwrite or duplicate tasks
+        raise FileExistsError(f"Queue {queue_dir} already holds tasks; initialise a new directory")
+
+    subjects = subjects or discover_subjects(data_dir)
+    data_dir = os.path.join(data_dir, '')
+    n_tasks = 0
+    for subject in subjects:
+        for condition, filepath in get_condition_files(subject, data_dir).items():
+            if not os.path.exists(filepath):
+                continue
+            task = {'subject': subject, 'condition': condition, 'filepath': os.path.abspath(filepath)}
+            _write_atomic(os.path.join(queue_dir, 'pending', f"{n_tasks:08d}.json"), json.dumps(task))
+            n_tasks += 1
+    return n_tasks
+
+
+def queue_status(queue_dir):
+    """Count task files in each queue state."""
+    return {name: sum(1 for entry in os.scandir(os.path.join(queue_dir, name)) if not entry.name.startswith('.')
+                      and '.tmp-' not in entry.name)
+            for name in QUEUE_DIRS}
+
+
+def scan_pending(queue_dir):
+    """
+    List the pending task names, rotated to start at a random position.
+
+    Workers that scan at the same time then start claiming in different places instead
+    of all racing for the lowest-numbered file.
+    """
+    names = sorted(entry.name for entry in os.scandir(os.path.join(queue_dir, 'pending'))
+                   if entry.name.endswith('.json'))
+    offset = random.randrange(len(names)) if names else 0
+    return names[offset:] + names[:offset]
+
+
+def claim_task(queue_dir, worker_id, candidates=None):
+    """
+    Claim one pending task by renaming it into ``leased/``.
+
+    ``rename`` is atomic on a POSIX filesystem, so when several workers race for the
+    same file exactly one succeeds and the others move on to the next candidate.
+
+    ``candidates`` is a deque of pending task names kept by the caller between claims.
+    Claims walk it and only rescan ``pending/`` (``scan_pending``) when it runs out, so a
+    claim costs a rename instead of listing and sorting the whole directory. Tasks
+    returned by the reaper are picked up at the next rescan.
+    """
+    candidates = deque() if candidates is None else candidates
+    pending_dir = os.path.join(queue_dir, 'pending')
+    while True:
+        if not candidates:
+            candidates.extend(scan_pending(queue_dir))
+            if not candidates:
+                return None, None
+        name = candidates.popleft()
+        task_path = os.path.join(pending_dir, name)
+        lease_path = os.path.join(queue_dir, 'leased', f"{name}@{worker_id}")
+        try:
+            # rename keeps the mtime, so refresh it first or a reaper could see a stale lease
+            os.utime(task_path)
+            os.rename(task_path, lease_path)
+        except FileNotFoundError:
+            continue
+        with open(lease_path) as f:
+            return lease_path, json.load(f)
+
+
+def renew_lease(lease_path):
+    """Heartbeat: push the lease expiry forward. Returns False if the lease was lost."""
+    try:
+        os.utime(lease_path)
+        return True
+    except FileNotFoundError:
+        return False
+
+
+def reap_expired_leases(queue_dir, lease_seconds):
+    """Return tasks whose lease has not been renewed within ``lease_seconds`` to ``pending/``."""
+    now = time.time()
+    n_reaped = 0
+    for entry in os.scandir(os.path.join(queue_dir, 'leased')):
+        try:
+            expired = now - entry.stat().st_mtime > lease_seconds
+        except FileNotFoundError:
+            continue
+        if expired:
+            task_name = entry.name.split('@', 1)[0]
+            try:
+                os.rename(entry.path, os.path.join(queue_dir, 'pending', task_name))
+                n_reaped += 1
+            except FileNotFoundError:
+                pass
+    return n_reaped
+
+
+def _finish_lease(queue_dir, lease_path, state, error=None):
+    """Move a leased task to ``done/`` or ``failed/``; a lost lease is silently ignored."""
+    task_name = os.path.basename(lease_path).split('@', 1)[0]
+    target = os.path.join(queue_dir, state, task_name)
+    try:
+        if error is not None:
+            with open(lease_path) as f:
+                task = json.load(f)
+            task['error'] = error
+            _write_atomic(target, json.dumps(task))
+            os.remove(lease_path)
+        else:
+            os.rename(lease_path, target)
+    except FileNotFoundError:
+        pass
+
+
+def run_worker(queue_dir, worker_id=None, batch_size=50, lease_seconds=300.0, poll_interval=1.0):
+    """
+    Claim and process tasks until the queue is drained.
+
+    Feature rows are buffered for up to ``batch_size`` tasks and written as one shard file
+    (atomic rename) before those tasks are marked done. A heartbeat thread renews every
+    held lease three times per ``lease_seconds``, so neither a slow task nor a long batch
+    lets leases expire while the worker is alive. Claims walk a cached listing of
+    ``pending/`` that starts at a random offset (see ``claim_task``), and all tasks share
+    one ``PipelineWorkspace``. If the worker dies, its leases expire and other workers
+    redo the tasks; the reducer drops any duplicates.
+
+    Returns
+    -------
+    n_processed : int
+        Number of tasks this worker completed
+    """
+    worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+    shard_index = 0
+    n_processed = 0
+    rows = []
+    leases = []
+    candidates = deque()
+    workspace = PipelineWorkspace()
+
+    held = set()
+    held_lock = threading.Lock()
+    stop_heartbeat = threading.Event()
+
+    def heartbeat():
+        while not stop_heartbeat.wait(lease_seconds / 3):
+            with held_lock:
+                for lease_path in held:
+                    renew_lease(lease_path)
+
+    def release(lease_path, state, error=None):
+        _finish_lease(queue_dir, lease_path, state, error)
+        with held_lock:
+            held.discard(lease_path)
+
+    def flush_shard():
+        nonlocal shard_index
+        if rows:
+            shard_path = os.path.join(queue_dir, 'shards', f"{worker_id}-{shard_index:05d}.csv")
+            _write_atomic(shard_path, pd.DataFrame(rows).to_csv(index=False))
+            shard_index += 1
+        for lease_path in leases:
+            release(lease_path, 'done')
+        rows.clear()
+        leases.clear()
+
+    heartbeat_thread = threading.Thread(target=heartbeat, daemon=True)
+    heartbeat_thread.start()
+    try:
+        while True:
+            lease_path, task = claim_task(queue_dir, worker_id, candidates)
+            if lease_path is None:
+                flush_shard()
+                reap_expired_leases(queue_dir, lease_seconds)
+                status = queue_status(queue_dir)
+                if status['pending'] == 0 and status['leased'] == 0:
+                    return n_processed
+                time.sleep(poll_interval)
+                continue
+
+            with held_lock:
+                held.add(lease_path)
+            try:
+                row = analyze_condition(task['subject'], task['condition'], task['filepath'], workspace)[0]
+            except Exception as e:
+                release(lease_path, 'failed', error=f"{type(e).__name__}: {e}")
+                continue
+
+            rows.append(row)
+            leases.append(lease_path)
+            n_processed += 1
+            if len(rows) >= batch_size:
+                flush_shard()
+    finally:
+        stop_heartbeat.set()
+        heartbeat_thread.join()
+
+
+def reduce_shards(queue_dir, output_path=None):
+    """
+    Merge all feature shards and run the paired t-tests.
+
+    Returns
+    -------
+    all_results_df : DataFrame
+        One row per recording (duplicates from re-run tasks removed)
+    ttest_results : dict
+        Output of ``perform_paired_ttest``
+    """
+    shard_dir = os.path.join(queue_dir, 'shards')
+    shards = [pd.read_csv(entry.path) for entry in sorted(os.scandir(shard_dir), key=lambda e: e.name)
+              if entry.name.endswith('.csv')]
+    if not shards:
+        return pd.DataFrame(), {}
+
+    all_results_df = (pd.concat(shards, ignore_index=True)
+                      .drop_duplicates(subset=['subject', 'condition'])
+                      .sort_values(['subject', 'condition'])
+                      .reset_index(drop=True))
+    ttest_results = perform_paired_ttest(all_results_df)
+
+    if output_path is not None:
+        all_results_df.to_csv(output_path, index=False)
+    return all_results_df, ttest_results
+
+
+def run_local_cluster(queue_dir, data_dir, n_workers=4, subjects=None, **worker_params):
+    """Stand-in for a multi-node run: several local worker processes share one queue directory."""
+    n_tasks = init_queue(queue_dir, data_dir, subjects)
+    print(f"Queued {n_tasks} recordings in {queue_dir}")
+
+    workers = [multiprocessing.Process(target=run_worker, args=(queue_dir, f"local{i}"), kwargs=worker_params)
+               for i in range(n_workers)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    print(f"Queue status: {queue_status(queue_dir)}")
+    return reduce_shards(queue_dir)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cohort processing through a shared-filesystem work queue.")
+    parser.add_argument('command', choices=['init', 'worker', 'reduce', 'status'])
+    parser.add_argument('--queue', required=True, help="Queue directory on shared storage")
+    parser.add_argument('--data-dir', default='.//data//', help="Recording directory (init)")
+    parser.add_argument('--batch-size', type=int, default=50, help="Tasks per shard (worker)")
+    parser.add_argument('--lease-seconds', type=float, default=300.0, help="Lease expiry (worker)")
+    parser.add_argument('--output', default='.//results//all_subjects_features.csv', help="Merged table (reduce)")
+    args = parser.parse_args()
+
+    if args.command == 'init':
+        print(f"Queued {init_queue(args.queue, args.data_dir)} recordings")
+    elif args.command == 'worker':
+        print(f"Processed {run_worker(args.queue, batch_size=args.batch_size, lease_seconds=args.lease_seconds)} recordings")
+    elif args.command == 'status':
+        print(queue_status(args.queue))
+    else:
+        all_data_df, ttest_results = reduce_shards(args.queue, args.output)
+        print_statistical_results(ttest_results, all_data_df)
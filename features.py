@@ -0,0 +1,215 @@
+import numpy as np
+from scipy.fft import irfft, next_fast_len, rfft
+
+TREMOR_BAND = (3.0, 20.0)
+
+
+class SpectralTable:
+    """
+    Cumulative PSD table and analytic signal shared by all tremor features.
+
+    Band integrals and band moments become two lookups and a subtraction, so each
+    feature costs O(1) (or O(log n) for locating band edges) once the table exists.
+
+    Columns of ``cumulative``
+    -------------------------
+    0 : trapezoidal integral of psd          (band power)
+    1 : trapezoidal integral of f * psd      (spectral centroid)
+    2 : running sum of psd                   (spectral entropy normaliser)
+    3 : running sum of psd * log(psd)        (spectral entropy)
+    """
+
+    def __init__(self, processed, freqs, psd, band=TREMOR_BAND, workspace=None):
+        self.processed = processed
+        self.freqs = freqs
+        self.psd = psd
+
+        safe_psd = np.where(psd > 0, psd, 1)
+        values = np.column_stack((psd, freqs * psd, psd, psd * np.log(safe_psd)))
+        self.cumulative = np.zeros_like(values)
+        # Trapezoid columns integrate bin-to-bin; running-sum columns just accumulate
+        self.cumulative[1:, :2] = 0.5 * (values[1:, :2] + values[:-1, :2]) * np.diff(freqs)[:, None]
+        self.cumulative[0, 2:] = values[0, 2:]
+        self.cumulative[1:, 2:] = values[1:, 2:]
+        np.cumsum(self.cumulative, axis=0, out=self.cumulative)
+
+        self.band = self.band_indices(*band)
+        lo, hi = self.band
+        self.peak_index = lo + int(np.argmax(psd[lo:hi + 1]))
+
+        # Analytic signal (processed + 1j * quadrature) from one real FFT pair; zero-padding to a fast FFT length
+        # only affects the last few envelope samples
+        n = len(processed)
+        n_fft = next_fast_len(n, real=True)
+        # numpy.fft matches scipy.fft exactly and can write into workspace buffers, but upcasts
+        # float32 internally, so only float64 signals use it
+        buffered = workspace is not None and processed.dtype == np.float64
+        if buffered:
+            spectrum = np.fft.rfft(processed, n_fft, out=workspace.scratch('spectrum', n_fft // 2 + 1, np.complex128))
+        else:
+            spectrum = rfft(processed, n_fft)
+        spectrum *= -1j
+        spectrum[0] = 0
+        if n_fft % 2 == 0:
+            spectrum[-1] = 0
+        if buffered:
+            self.quadrature = np.fft.irfft(spectrum, n_fft, out=workspace.scratch('quadrature', n_fft))[:n]
+        else:
+            self.quadrature = irfft(spectrum, n_fft)[:n]
+        envelope = None if workspace is None else workspace.scratch('envelope', n, processed.dtype)
+        self.envelope = np.hypot(processed, self.quadrature, out=envelope)
+        self.envelope_mean = np.mean(self.envelope)
+        self.envelope_std = np.std(self.envelope)
+
+    def band_indices(self, low_freq, high_freq):
+        """First and last bin inside [low_freq, high_freq], like the masks in ``compute_band_power``."""
+        lo = int(np.searchsorted(self.freqs, low_freq, side='left'))
+        hi = int(np.searchsorted(self.freqs, high_freq, side='right')) - 1
+        return lo, hi
+
+    def integral(self, low_freq, high_freq, column=0):
+        """Trapezoidal integral of a table column between two frequencies."""
+        lo, hi = self.band_indices(low_freq, high_freq)
+        if hi <= lo:
+            return 0.0
+        return self.cumulative[hi, column] - self.cumulative[lo, column]
+
+    def running_sum(self, lo, hi, column):
+        """Discrete sum of a running-sum column over bins lo..hi."""
+        below = self.cumulative[lo - 1, column] if lo > 0 else 0.0
+        return self.cumulative[hi, column] - below
+
+
+def band_power(table, low_freq, high_freq):
+    """Power in a band, equal to ``compute_band_power``."""
+    return table.integral(low_freq, high_freq)
+
+
+def feature_rms(table):
+    return np.sqrt(np.mean(table.processed ** 2))
+
+
+def feature_peak_frequency(table):
+    return table.freqs[table.peak_index]
+
+
+def feature_total_power(table):
+    return table.cumulative[-1, 0]
+
+
+def feature_relative_power_8_12(table):
+    total_power = feature_total_power(table)
+    return band_power(table, 8, 12) / total_power if total_power > 0 else 0
+
+
+def feature_peak_power(table):
+    return table.psd[table.peak_index]
+
+
+def feature_spectral_centroid(table):
+    power = band_power(table, *TREMOR_BAND)
+    return table.integral(*TREMOR_BAND, column=1) / power if power > 0 else np.nan
+
+
+def feature_spectral_entropy(table):
+    """Shannon entropy of the normalised 3-20 Hz spectrum, scaled to [0, 1]."""
+    lo, hi = table.band
+    n_bins = hi - lo + 1
+    total = table.running_sum(lo, hi, 2)
+    if n_bins < 2 or total <= 0:
+        return np.nan
+    # H = log(S) - sum(p log p) / S with S = sum(p)
+    entropy = np.log(total) - table.running_sum(lo, hi, 3) / total
+    return entropy / np.log(n_bins)
+
+
+def feature_harmonic_ratio(table, half_width=1.0):
+    """Power around twice the peak frequency relative to power around the peak."""
+    peak = feature_peak_frequency(table)
+    fundamental = band_power(table, peak - half_width, peak + half_width)
+    harmonic = band_power(table, 2 * peak - half_width, 2 * peak + half_width)
+    return harmonic / fundamental if fundamental > 0 else np.nan
+
+
+def feature_peak_width(table):
+    """Full width at half maximum of the dominant peak, interpolated between bins."""
+    freqs, psd, peak = table.freqs, table.psd, table.peak_index
+    half = psd[peak] / 2
+    below = psd < half
+
+    left_candidates = np.flatnonzero(below[:peak])
+    right_candidates = np.flatnonzero(below[peak + 1:])
+    if len(left_candidates) == 0 or len(right_candidates) == 0:
+        return np.nan
+    left = left_candidates[-1]
+    right = peak + 1 + right_candidates[0]
+
+    f_left = np.interp(half, psd[left:left + 2], freqs[left:left + 2])
+    f_right = np.interp(half, psd[right - 1:right + 1][::-1], freqs[right - 1:right + 1][::-1])
+    return f_right - f_left
+
+
+def feature_peak_q(table):
+    width = feature_peak_width(table)
+    return feature_peak_frequency(table) / width if width > 0 else np.nan
+
+
+def feature_envelope_amplitude(table):
+    """Mean Hilbert envelope: average instantaneous tremor amplitude."""
+    return table.envelope_mean
+
+
+def feature_envelope_cv(table):
+    """Coefficient of variation of the Hilbert envelope (0 = perfectly steady amplitude)."""
+    return table.envelope_std / table.envelope_mean if table.envelope_mean > 0 else np.nan
+
+
+def feature_envelope_regularity(table):
+    """Amplitude regularity in (0, 1]: 1 / (1 + envelope CV)."""
+    return 1 / (1 + feature_envelope_cv(table))
+
+
+TREMOR_FEATURES = {
+    'rms': feature_rms,
+    'peak_frequency': feature_peak_frequency,
+    'band_power_8_12': lambda table: band_power(table, 8, 12),
+    'band_power_3_8': lambda table: band_power(table, 3, 8),
+    'relative_power_8_12': feature_relative_power_8_12,
+    'total_power': feature_total_power,
+    'peak_power': feature_peak_power,
+    'spectral_centroid': feature_spectral_centroid,
+    'spectral_entropy': feature_spectral_entropy,
+    'harmonic_ratio': feature_harmonic_ratio,
+    'peak_width': feature_peak_width,
+    'peak_q': feature_peak_q,
+    'envelope_amplitude': feature_envelope_amplitude,
+    'envelope_cv': feature_envelope_cv,
+    'envelope_regularity': feature_envelope_regularity,
+}
+
+
+def compute_feature_set(processed, freqs, psd, feature_names=None, workspace=None):
+    """
+    Compute tremor features from one shared spectral table.
+
+    Parameters
+    ----------
+    processed : array
+        Preprocessed signal (used for RMS and the analytic signal)
+    freqs : array
+        Frequency axis of the PSD
+    psd : array
+        Power spectral density
+    feature_names : list
+        Names from ``TREMOR_FEATURES`` to compute (default: all)
+    workspace : PipelineWorkspace
+        Optional buffers for the analytic signal
+
+    Returns
+    -------
+    features : dict
+        Feature name -> value
+    """
+    table = SpectralTable(processed, freqs, psd, workspace=workspace)
+    names = feature_names or TREMOR_FEATURES
+    return {name: TREMOR_FEATURES[name](table) for name in names}
@@ -0,0 +1,162 @@
+import numpy as np
+
+from batch_runner import recording_key
+from data_processing_workflow import analyze_condition, get_condition_files
+
+FINGERPRINT_GRID = np.linspace(3.0, 20.0, 69)
+
+
+def spectral_fingerprint(freqs, psd, grid=FINGERPRINT_GRID):
+    """
+    Fixed-length, normalised fingerprint of a PSD.
+
+    The log-PSD is interpolated onto ``grid`` (3-20 Hz in 0.25 Hz steps by default), its
+    mean removed and scaled to unit length. Fingerprints therefore compare spectral shape
+    independent of overall amplitude, and their Euclidean distance is a monotone function
+    of the correlation between log spectra.
+
+    Returns
+    -------
+    fingerprint : array
+        float32 vector of ``len(grid)`` values
+    """
+    log_psd = np.log10(np.maximum(psd, 1e-20))
+    values = np.interp(grid, freqs, log_psd)
+    values -= values.mean()
+    norm = np.linalg.norm(values)
+    if norm > 0:
+        values /= norm
+    return values.astype(np.float32)
+
+
+class FingerprintIndex:
+    """
+    Nearest-neighbour index over spectral fingerprints.
+
+    Fingerprints live in one contiguous float32 matrix that grows by doubling, so inserts
+    are amortised O(1) and a query is a single matrix-vector product plus a partial sort.
+    For unit-length fingerprints ``|a - b|^2 = 2 - 2 a.b``, so no per-row norms are needed.
+    Keys are unique: a dict maps each key to its row, and inserting a key that is already
+    stored replaces its fingerprint instead of adding a duplicate row.
+
+    Parameters
+    ----------
+    grid : array
+        Frequency grid of the fingerprints
+    capacity : int
+        Initial number of rows to allocate
+    """
+
+    def __init__(self, grid=FINGERPRINT_GRID, capacity=1024):
+        self.grid = np.asarray(grid, dtype=float)
+        self._matrix = np.zeros((max(capacity, 1), len(self.grid)), dtype=np.float32)
+        self.keys = []
+        self._rows = {}
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __contains__(self, key):
+        return key in self._rows
+
+    @property
+    def matrix(self):
+        """The stored fingerprints, one row per recording (a view, not a copy)."""
+        return self._matrix[:len(self.keys)]
+
+    def _reserve(self, n):
+        if n > len(self._matrix):
+            grown = np.zeros((max(n, 2 * len(self._matrix)), self._matrix.shape[1]), dtype=np.float32)
+            grown[:len(self._matrix)] = self._matrix
+            self._matrix = grown
+
+    def add(self, key, fingerprint):
+        """Insert (or replace) one fingerprint under ``key``."""
+        self.add_many([key], np.asarray(fingerprint)[None, :])
+
+    def add_many(self, keys, fingerprints):
+        """Insert a (n, len(grid)) block of fingerprints; keys already stored are replaced."""
+        fingerprints = np.asarray(fingerprints, dtype=np.float32)
+        if fingerprints.shape != (len(keys), len(self.grid)):
+            raise ValueError(f"Expected fingerprints of shape ({len(keys)}, {len(self.grid)}), "
+                             f"got {fingerprints.shape}")
+        rows = []
+        for key in keys:
+            if key not in self._rows:
+                self._rows[key] = len(self.keys)
+                self.keys.append(key)
+            rows.append(self._rows[key])
+        self._reserve(len(self.keys))
+        self._matrix[rows] = fingerprints
+
+    def add_psd(self, key, freqs, psd):
+        """Fingerprint a PSD (e.g. from ``compute_psd_welch``) and insert it."""
+        self.add(key, spectral_fingerprint(freqs, psd, self.grid))
+
+    def query_many(self, fingerprints, k=5):
+        """
+        k nearest stored fingerprints for each row of ``fingerprints``.
+
+        Returns
+        -------
+        indices : array
+            (n_queries, k) row indices into the index, nearest first
+        distances : array
+            (n_queries, k) Euclidean distances
+        """
+        queries = np.atleast_2d(np.asarray(fingerprints, dtype=np.float32))
+        k = min(k, len(self.keys))
+        if k == 0:
+            return np.zeros((len(queries), 0), dtype=int), np.zeros((len(queries), 0))
+
+        similarity = queries @ self.matrix.T
+        top = np.argpartition(-similarity, k - 1, axis=1)[:, :k]
+        top_similarity = np.take_along_axis(similarity, top, axis=1)
+        order = np.argsort(-top_similarity, axis=1)
+        indices = np.take_along_axis(top, order, axis=1)
+        distances = np.sqrt(np.maximum(2 - 2 * np.take_along_axis(top_similarity, order, axis=1), 0))
+        return indices, distances
+
+    def query(self, fingerprint, k=5):
+        """Return [(key, distance), ...] for the ``k`` recordings most similar to ``fingerprint``."""
+        indices, distances = self.query_many(fingerprint, k)
+        return [(self.keys[i], float(d)) for i, d in zip(indices[0], distances[0])]
+
+    def query_psd(self, freqs, psd, k=5):
+        """Like ``query`` but starting from a PSD."""
+        return self.query(spectral_fingerprint(freqs, psd, self.grid), k)
+
+    def save(self, path):
+        """Store the index in an .npz file."""
+        np.savez(path, grid=self.grid, matrix=self.matrix, keys=np.array(self.keys, dtype=str))
+
+    @classmethod
+    def load(cls, path):
+        """Restore an index stored with ``save``."""
+        with np.load(path) as state:
+            index = cls(state['grid'], capacity=len(state['keys']))
+            index.add_many(state['keys'].tolist(), state['matrix'])
+        return index
+
+
+def build_index(subjects, data_dir, index=None):
+    """
+    Fingerprint every recording of ``subjects`` with the standard pipeline.
+
+    Pass an existing ``index`` to add newly archived recordings to it; recordings whose
+    key it already holds are skipped without being processed again. Recordings that
+    fail are reported and skipped.
+    """
+    if index is None:
+        index = FingerprintIndex()
+    for subject in subjects:
+        for condition, filepath in get_condition_files(subject, data_dir).items():
+            if recording_key(subject, condition) in index:
+                continue
+            try:
+                _, _, _, _, freqs_psd, psd = analyze_condition(subject, condition, filepath)
+            except Exception as e:
+                print(f"Error processing {subject} {condition}: {e}")
+                continue
+            index.add_psd(recording_key(subject, condition), freqs_psd, psd)
+    return index
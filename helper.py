@@ -1,22 +1,37 @@
 import pandas as pd
 import numpy as np
-import sys
+
+
+class RecordingLoadError(Exception):
+    """Raised when a recording file cannot be loaded."""
+
+
+class RecordingNotFoundError(RecordingLoadError, FileNotFoundError):
+    """Raised when a recording file does not exist."""
+
+
+class MalformedRecordingError(RecordingLoadError, ValueError):
+    """Raised when a recording file cannot be parsed or lacks required columns."""
 
 
 def load_accelerometer_data(filepath):
-    """Load accelerometer data from CSV file."""
+    """
+    Load accelerometer data from CSV file.
+
+    Raises RecordingNotFoundError or MalformedRecordingError instead of exiting,
+    so callers processing many recordings can skip a bad one and carry on.
+    """
     try:
         df = pd.read_csv(filepath)
-        required_cols = ['time', 'ax', 'ay', 'az', 'atotal']
-        if not all(col in df.columns for col in required_cols):
-            raise ValueError(f"Missing required columns. Expected: {required_cols}")
-        return df
     except FileNotFoundError:
-        print(f"File not found: {filepath}")
-        sys.exit(1)
+        raise RecordingNotFoundError(f"File not found: {filepath}") from None
     except Exception as e:
-        print(f"Error loading file: {e}")
-        sys.exit(1)
+        raise MalformedRecordingError(f"Error loading file {filepath}: {e}") from e
+
+    required_cols = ['time', 'ax', 'ay', 'az', 'atotal']
+    if not all(col in df.columns for col in required_cols):
+        raise MalformedRecordingError(f"Missing required columns in {filepath}. Expected: {required_cols}")
+    return df
 
 
 def get_sampling_rate(df):
@@ -136,4 +151,20 @@ def export_statistics(ttest_results, output_path):
         rows.append(res)
     df = pd.DataFrame(rows)
     df.to_csv(output_path, index=False)
-    return df
\ No newline at end of file
+    return df
+
+def print_batch_report(report):
+    """Print completed and skipped recordings of a batch run."""
+    print("\n" + "=" * 80)
+    print("BATCH RUN REPORT")
+    print("=" * 80)
+    print(f"Completed recordings: {len(report['records'])} "
+          f"({report['n_processed']} this run, {report['n_resumed']} resumed from checkpoint)")
+    print(f"Skipped recordings:   {len(report['quarantined'])}")
+
+    if report['quarantined']:
+        print(f"\n{'Subject':<16} {'Condition':<10} {'Error':<26} {'Tries':<6} Reason")
+        print("-" * 80)
+        for entry in report['quarantined']:
+            print(f"{entry['subject']:<16} {entry['condition']:<10} {entry['error_type']:<26} "
+                  f"{entry['attempts']:<6} {entry['reason']}")
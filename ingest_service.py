@@ -0,0 +1,298 @@
+import asyncio
+import io
+import json
+import time
+import urllib.error
+import urllib.request
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from helper import get_sampling_rate, extract_signal
+from processing import extract_tremor_features
+
+REQUIRED_COLUMNS = ['time', 'ax', 'ay', 'az', 'atotal']
+MAX_UPLOAD_BYTES = 20 * 1024 * 1024
+MIN_SAMPLES = 256
+
+STATUS_TEXT = {
+    200: 'OK',
+    400: 'Bad Request',
+    404: 'Not Found',
+    405: 'Method Not Allowed',
+    411: 'Length Required',
+    413: 'Payload Too Large',
+    500: 'Internal Server Error',
+    503: 'Service Unavailable',
+}
+
+
+def parse_recording_upload(body):
+    """
+    Parse and validate an uploaded recording in the CSV layout of the data folder.
+
+    Raises ValueError with a client-facing message when the upload is unusable.
+    """
+    try:
+        df = pd.read_csv(io.BytesIO(body))
+    except Exception as e:
+        raise ValueError(f"Could not parse CSV: {e}")
+
+    missing = [col for col in REQUIRED_COLUMNS if col not in df.columns]
+    if missing:
+        raise ValueError(f"Missing required columns: {missing}. Expected: {REQUIRED_COLUMNS}")
+    if len(df) < MIN_SAMPLES:
+        raise ValueError(f"Recording too short: {len(df)} samples, need at least {MIN_SAMPLES}")
+
+    values = df[REQUIRED_COLUMNS].to_numpy(dtype=float)
+    if not np.isfinite(values).all():
+        raise ValueError("Recording contains missing or non-numeric values")
+    if not (np.diff(values[:, 0]) > 0).all():
+        raise ValueError("Time column must be strictly increasing")
+    return df
+
+
+def process_recording_upload(body, axis='atotal'):
+    """Worker entry point: validate an upload and return its tremor features as plain Python types."""
+    df = parse_recording_upload(body)
+    fs = get_sampling_rate(df)
+    signal_data, _ = extract_signal(df, axis)
+
+    features, _, _, _, _, _, _ = extract_tremor_features(
+        signal_data, fs,
+        artifact_params={'k': 1.5},
+        denoise_params={'window_size': 51, 'threshold_scale': 0.5, 'blend_factor': 0.3}
+    )
+
+    result = {key: value.item() if isinstance(value, np.generic) else value for key, value in features.items()}
+    result['fs'] = float(fs)
+    result['duration'] = float(df['time'].iloc[-1] - df['time'].iloc[0])
+    result['n_samples'] = len(df)
+    return result
+
+
+class IngestMetrics:
+    """Request counters, queue depth and a rolling latency window for the ingestion service."""
+
+    def __init__(self, window=1000):
+        self.accepted = 0
+        self.rejected = 0
+        self.completed = 0
+        self.failed = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.latencies = deque(maxlen=window)
+
+    def snapshot(self, max_workers):
+        latencies = np.array(self.latencies) if self.latencies else np.zeros(1)
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+        return {
+            'accepted': self.accepted,
+            'rejected': self.rejected,
+            'completed': self.completed,
+            'failed': self.failed,
+            'in_flight': self.in_flight,
+            'queued': max(self.in_flight - max_workers, 0),
+            'max_in_flight': self.max_in_flight,
+            'latency_p50_ms': float(p50) * 1000,
+            'latency_p95_ms': float(p95) * 1000,
+            'latency_p99_ms': float(p99) * 1000,
+        }
+
+
+class IngestService:
+    """
+    Local HTTP service that accepts recording uploads and returns tremor features as JSON.
+
+    Feature extraction runs in a bounded process pool so the event loop only does I/O.
+    At most ``max_workers + max_queue`` uploads are admitted at once; further uploads
+    are answered immediately with 503 and a Retry-After header instead of piling up,
+    which keeps latency of admitted requests bounded during bursts.
+
+    Endpoints
+    ---------
+    POST /recordings : CSV body -> feature JSON
+    GET /metrics     : counters, queue depth and latency percentiles
+    GET /health      : liveness check
+    """
+
+    def __init__(self, host='127.0.0.1', port=8765, max_workers=2, max_queue=8,
+                 request_timeout=60.0, max_upload_bytes=MAX_UPLOAD_BYTES):
+        self.host = host
+        self.port = port
+        self.max_workers = max_workers
+        self.capacity = max_workers + max_queue
+        self.request_timeout = request_timeout
+        self.max_upload_bytes = max_upload_bytes
+        self.metrics = IngestMetrics()
+        self._executor = None
+        self._server = None
+
+    async def start(self):
+        self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        # Port 0 asks the OS for a free port; report the one actually bound
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        if self._executor is not None:
+            # shutdown(wait=True) blocks until running jobs finish; keep the event loop free meanwhile
+            await asyncio.to_thread(self._executor.shutdown, wait=True, cancel_futures=True)
+
+    async def serve_forever(self):
+        await self.start()
+        print(f"Ingestion service listening on http://{self.host}:{self.port}")
+        try:
+            await self._server.serve_forever()
+        finally:
+            await self.stop()
+
+    async def _handle_connection(self, reader, writer):
+        try:
+            status, payload, headers = await self._handle_request(reader)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            writer.close()
+            return
+        except Exception as e:
+            status, payload, headers = 500, {'error': str(e)}, {}
+
+        body = json.dumps(payload).encode()
+        lines = [f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}",
+                 'Content-Type: application/json',
+                 f'Content-Length: {len(body)}',
+                 'Connection: close']
+        lines += [f'{name}: {value}' for name, value in headers.items()]
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode() + body)
+        try:
+            await writer.drain()
+        except ConnectionError:
+            pass
+        writer.close()
+
+    async def _handle_request(self, reader):
+        request_line = (await reader.readline()).decode('latin-1').strip()
+        parts = request_line.split()
+        if len(parts) != 3:
+            return 400, {'error': 'Malformed request line'}, {}
+        method, path, _ = parts
+
+        headers = {}
+        while True:
+            line = (await reader.readline()).decode('latin-1')
+            if line in ('\r\n', '\n', ''):
+                break
+            name, _, value = line.partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        if path == '/health':
+            return 200, {'status': 'ok'}, {}
+        if path == '/metrics':
+            return 200, self.metrics.snapshot(self.max_workers), {}
+        if path != '/recordings':
+            return 404, {'error': f'Unknown path: {path}'}, {}
+        if method != 'POST':
+            return 405, {'error': 'Use POST to upload a recording'}, {'Allow': 'POST'}
+
+        if 'content-length' not in headers:
+            return 411, {'error': 'Content-Length header required'}, {}
+        try:
+            length = int(headers['content-length'])
+        except ValueError:
+            length = -1
+        if length < 0:
+            return 400, {'error': 'Invalid Content-Length header'}, {}
+        if length > self.max_upload_bytes:
+            return 413, {'error': f'Upload exceeds {self.max_upload_bytes} bytes'}, {}
+
+        # Backpressure: refuse before reading the body so a burst cannot exhaust memory. The slot is
+        # reserved here, not after the body arrives, so slow uploads count against the capacity too
+        metrics = self.metrics
+        if metrics.in_flight >= self.capacity:
+            metrics.rejected += 1
+            return 503, {'error': 'Server busy, retry later'}, {'Retry-After': '1'}
+        metrics.in_flight += 1
+        metrics.max_in_flight = max(metrics.max_in_flight, metrics.in_flight)
+        try:
+            body = await reader.readexactly(length)
+        except BaseException:
+            metrics.in_flight -= 1
+            raise
+        return await self._process(body)
+
+    def _release_slot(self, loop):
+        """Done callback of a pool job: free its slot on the event loop thread."""
+        def release():
+            self.metrics.in_flight -= 1
+        try:
+            loop.call_soon_threadsafe(release)
+        except RuntimeError:
+            # Event loop already closed: nothing left to admit
+            pass
+
+    async def _process(self, body):
+        """
+        Run one admitted upload in the process pool.
+
+        The admission slot is released when the pool job itself finishes, not when the
+        request returns. A timed-out job keeps running in its worker (a running pool task
+        cannot be cancelled), so releasing at the timeout would admit new uploads while
+        every worker is still busy with abandoned ones.
+        """
+        metrics = self.metrics
+        metrics.accepted += 1
+        start = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        try:
+            job = self._executor.submit(process_recording_upload, body)
+        except Exception as e:
+            # e.g. BrokenProcessPool: no job holds the slot
+            metrics.in_flight -= 1
+            metrics.failed += 1
+            return 500, {'error': f'{type(e).__name__}: {e}'}, {}
+        job.add_done_callback(lambda _: self._release_slot(loop))
+
+        try:
+            features = await asyncio.wait_for(asyncio.wrap_future(job), self.request_timeout)
+        except ValueError as e:
+            metrics.failed += 1
+            return 400, {'error': str(e)}, {}
+        except asyncio.TimeoutError:
+            metrics.failed += 1
+            return 503, {'error': 'Processing timed out'}, {'Retry-After': '5'}
+        except Exception as e:
+            # Worker crashes (e.g. BrokenProcessPool) and unexpected processing errors
+            metrics.failed += 1
+            return 500, {'error': f'{type(e).__name__}: {e}'}, {}
+        finally:
+            metrics.latencies.append(time.perf_counter() - start)
+
+        metrics.completed += 1
+        return 200, features, {}
+
+
+def upload_recording(filepath, host='127.0.0.1', port=8765, timeout=60.0):
+    """Local client: upload one CSV recording and return (status, decoded JSON response)."""
+    with open(filepath, 'rb') as f:
+        body = f.read()
+    request = urllib.request.Request(f'http://{host}:{port}/recordings', data=body, method='POST',
+                                     headers={'Content-Type': 'text/csv'})
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+async def upload_burst(filepaths, host='127.0.0.1', port=8765):
+    """Local client: upload several recordings concurrently and return their (status, response) pairs."""
+    return await asyncio.gather(*(asyncio.to_thread(upload_recording, path, host, port) for path in filepaths))
+
+
+if __name__ == "__main__":
+    asyncio.run(IngestService().serve_forever())
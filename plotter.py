@@ -1,5 +1,14 @@
 import numpy as np
 import matplotlib.pyplot as plt
+from matplotlib.collections import LineCollection
+from scipy import stats
+
+CONDITIONS = ['rest', 'post', 'fat_rest', 'fat_post']
+CONDITION_LABELS = ['Rest', 'Postural', 'Rest (Fatigue)', 'Postural (Fatigue)']
+CONDITION_COLORS = ['#2ecc71', '#3498db', '#e74c3c', '#9b59b6']
+
+# Above this many subjects plot_group_results switches to plot_cohort_results
+COHORT_PLOT_THRESHOLD = 30
 
 
 def plot_raw_axes(df):
@@ -262,12 +271,19 @@ def plot_subject_analysis_summary(raw_data, processed_signals, psd_data, results
     plt.show()
 
 
-def plot_group_results(df, ttest_results):
-    """Create visualization of group results."""
-    fig = plt.figure(figsize=(14, 10))
+def plot_group_results(df, ttest_results, cohort_threshold=COHORT_PLOT_THRESHOLD):
+    """
+    Create visualization of group results.
 
+    Cohorts with more than ``cohort_threshold`` subjects are drawn with
+    ``plot_cohort_results`` instead of one bar pair and line per subject.
+    """
     subjects = sorted(df['subject'].unique())
     n_subjects = len(subjects)
+    if n_subjects > cohort_threshold:
+        return plot_cohort_results(df, ttest_results)
+
+    fig = plt.figure(figsize=(14, 10))
 
     # Plot 1: Individual subject 8-12 Hz band power (Postural)
     ax1 = fig.add_subplot(2, 2, 1)
@@ -358,3 +374,149 @@ def plot_group_results(df, ttest_results):
                  fontsize=13, fontweight='bold')
     plt.tight_layout(rect=[0, 0, 1, 0.96])
     plt.show()
+
+
+def condition_matrix(df, feature='band_power_8_12'):
+    """Subject x condition table of one feature (NaN where a recording is missing), built in one pivot."""
+    matrix = df.pivot_table(index='subject', columns='condition', values=feature, aggfunc='first')
+    return matrix.reindex(columns=CONDITIONS)
+
+
+def _paired_difference_ci(diff, confidence=0.95):
+    """Mean paired difference and its t-based confidence interval."""
+    n = len(diff)
+    mean = np.mean(diff)
+    if n < 2:
+        return mean, np.nan, np.nan
+    margin = stats.t.ppf(0.5 + confidence / 2, n - 1) * np.std(diff, ddof=1) / np.sqrt(n)
+    return mean, mean - margin, mean + margin
+
+
+def plot_cohort_results(df, ttest_results, feature='band_power_8_12', top_n=20, page=0):
+    """
+    Group results for large cohorts.
+
+    The subject x condition matrix is built once and every panel draws a fixed number of
+    artists (one box plot, one scatter, one ``LineCollection``, one image), so rendering
+    time hardly grows with the number of subjects. Per-subject detail is limited to the
+    ``top_n`` subjects with the largest postural change; ``page`` steps through the rest.
+
+    Panels: distributions per condition, paired postural lines, paired-difference
+    histograms with 95% CI, a heatmap of all subjects and the top-N detail.
+    """
+    matrix = condition_matrix(df, feature)
+    values = matrix.to_numpy(dtype=float)
+    n_subjects = len(matrix)
+    rng = np.random.default_rng(0)
+
+    fig = plt.figure(figsize=(16, 10))
+
+    # Plot 1: Distribution per condition, all subjects as one jittered scatter
+    ax1 = fig.add_subplot(2, 3, 1)
+    present = [column[~np.isnan(column)] for column in values.T]
+    ax1.boxplot(present, showfliers=False, widths=0.5)
+    rows, cols = np.nonzero(~np.isnan(values))
+    ax1.scatter(cols + 1 + rng.uniform(-0.15, 0.15, len(cols)), values[rows, cols], s=6, alpha=0.4,
+                c=np.array(CONDITION_COLORS)[cols], linewidths=0)
+    ax1.set_xticks(np.arange(1, len(CONDITIONS) + 1))
+    ax1.set_xticklabels(CONDITION_LABELS, rotation=20)
+    ax1.set_yscale('log')
+    ax1.set_ylabel(feature)
+    ax1.set_title('Distribution by Condition')
+    ax1.grid(True, alpha=0.3, axis='y')
+
+    # Plot 2: Paired postural comparison, one LineCollection for all subjects
+    ax2 = fig.add_subplot(2, 3, 2)
+    paired = values[:, [1, 3]]
+    paired = paired[~np.isnan(paired).any(axis=1)]
+    segments = np.stack((np.broadcast_to([0.0, 1.0], paired.shape), paired), axis=-1)
+    ax2.add_collection(LineCollection(segments, colors='gray', linewidths=0.5, alpha=0.3))
+    ax2.scatter(np.repeat([0, 1], len(paired)), paired.T.ravel(), s=6, alpha=0.4,
+                c=np.repeat([CONDITION_COLORS[1], CONDITION_COLORS[3]], len(paired)), linewidths=0)
+    if len(paired):
+        ax2.plot([0, 1], np.median(paired, axis=0), 'k-o', linewidth=2.5, label='Median')
+        ax2.legend(loc='upper right')
+    ax2.set_xlim(-0.3, 1.3)
+    ax2.set_yscale('log')
+    ax2.set_xticks([0, 1])
+    ax2.set_xticklabels(['Baseline', 'Post-Fatigue'])
+    ax2.set_ylabel(feature)
+    ax2.set_title('Postural: Paired Comparison')
+    ax2.grid(True, alpha=0.3)
+    if 'postural_8_12hz' in ttest_results:
+        res = ttest_results['postural_8_12hz']
+        sig_text = f"p = {res['p_value']:.4f}"
+        if res['significant']:
+            sig_text += " *"
+        ax2.text(0.5, 0.95, sig_text, transform=ax2.transAxes, ha='center', fontsize=11, fontweight='bold')
+
+    # Plot 3: Paired differences with 95% CI of the mean
+    ax3 = fig.add_subplot(2, 3, 3)
+    for baseline, fatigue, label, color in [(1, 3, 'Postural', CONDITION_COLORS[3]),
+                                            (0, 2, 'Rest', CONDITION_COLORS[2])]:
+        diff = values[:, fatigue] - values[:, baseline]
+        diff = diff[~np.isnan(diff)]
+        if len(diff) == 0:
+            continue
+        mean, low, high = _paired_difference_ci(diff)
+        ax3.hist(diff, bins=min(50, max(10, len(diff) // 5)), color=color, alpha=0.5,
+                 label=f'{label}: {mean:.2e} [{low:.2e}, {high:.2e}]')
+        ax3.axvline(mean, color=color, linewidth=2)
+        ax3.axvspan(low, high, color=color, alpha=0.2)
+    ax3.axvline(0, color='k', linestyle='--', linewidth=1)
+    ax3.set_xlabel(f'Post-Fatigue - Baseline ({feature})')
+    ax3.set_ylabel('Subjects')
+    ax3.set_title('Paired Differences (mean, 95% CI)')
+    ax3.legend(fontsize=8)
+
+    # Plot 4: Heatmap of all subjects, ordered by postural change
+    ax4 = fig.add_subplot(2, 3, 4)
+    order = np.argsort(np.nan_to_num(values[:, 3] - values[:, 1], nan=0.0))
+    with np.errstate(divide='ignore'):
+        log_values = np.log10(values[order])
+    image = ax4.imshow(np.ma.masked_invalid(log_values), aspect='auto', cmap='viridis', interpolation='nearest')
+    fig.colorbar(image, ax=ax4, label=f'log10 {feature}')
+    ax4.set_xticks(np.arange(len(CONDITIONS)))
+    ax4.set_xticklabels(CONDITION_LABELS, rotation=20)
+    if n_subjects <= 50:
+        ax4.set_yticks(np.arange(n_subjects))
+        ax4.set_yticklabels(matrix.index[order], fontsize=6)
+    else:
+        ax4.set_ylabel('Subjects (sorted by postural change)')
+    ax4.set_title('All Subjects')
+
+    # Plot 5: Top-N per-subject detail, paged
+    ax5 = fig.add_subplot(2, 3, 5)
+    change = values[:, 3] - values[:, 1]
+    ranked = np.argsort(-np.abs(np.nan_to_num(change, nan=0.0)))
+    shown = ranked[page * top_n:(page + 1) * top_n]
+    y = np.arange(len(shown))
+    ax5.barh(y - 0.2, np.nan_to_num(values[shown, 1]), 0.4, color=CONDITION_COLORS[1], label='Baseline')
+    ax5.barh(y + 0.2, np.nan_to_num(values[shown, 3]), 0.4, color=CONDITION_COLORS[3], label='Post-Fatigue')
+    ax5.set_yticks(y)
+    ax5.set_yticklabels(matrix.index[shown], fontsize=7)
+    ax5.invert_yaxis()
+    ax5.set_xlabel(feature)
+    n_pages = max(1, -(-n_subjects // top_n))
+    ax5.set_title(f'Postural: Largest Changes (page {page + 1}/{n_pages})')
+    ax5.legend(fontsize=8)
+    ax5.grid(True, alpha=0.3, axis='x')
+
+    # Plot 6: Summary statistics
+    ax6 = fig.add_subplot(2, 3, 6)
+    ax6.axis('off')
+    summary_lines = ["STATISTICAL SUMMARY", "=" * 40, ""]
+    for key, res in ttest_results.items():
+        summary_lines.append(f"{res['comparison']}")
+        summary_lines.append(f"  Feature: {res['feature']}, N = {res['n_subjects']}")
+        summary_lines.append(f"  Change:   {res['percent_change']:+.2f}%")
+        summary_lines.append(f"  t = {res['t_statistic']:.3f}, p = {res['p_value']:.4f}")
+        summary_lines.append("")
+    ax6.text(0.05, 0.95, "\n".join(summary_lines), transform=ax6.transAxes, fontsize=9,
+             verticalalignment='top', fontfamily='monospace',
+             bbox=dict(boxstyle='round', facecolor='lightgray', alpha=0.3))
+
+    plt.suptitle(f'Cohort Analysis: Effect of Forearm Fatigue on Tremor (N={n_subjects})',
+                 fontsize=13, fontweight='bold')
+    plt.tight_layout(rect=[0, 0, 1, 0.96])
+    plt.show()
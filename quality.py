@@ -0,0 +1,120 @@
+import numpy as np
+
+QUALITY_COLUMNS = ['time', 'ax', 'ay', 'az', 'atotal']
+
+# Metric value at which a recording is considered unusable; each metric contributes
+# a sub-score falling linearly from 1 (metric = 0) to 0 (metric >= limit).
+# artifacts_percent is reported but not scored: on the clean recordings in data/ the IQR
+# rule flags 1-11% of samples (tremor bursts have heavy tails), which says little
+# about recording quality and would dominate the score.
+QUALITY_LIMITS = {
+    'clipping_ratio': 0.05,
+    'flat_fraction': 0.25,
+    'gap_count': 10,
+    'jitter': 0.5,
+    'magnitude_discrepancy': 0.5,
+}
+
+
+def _run_mask(mask, min_length):
+    """Mark samples belonging to runs of at least ``min_length`` True values along axis 0."""
+    n, n_cols = mask.shape
+    padded = np.zeros((n_cols, n + 2), dtype=np.int8)
+    padded[:, 1:-1] = mask.T
+    edges = np.flatnonzero(np.diff(padded.ravel()))
+    starts, ends = edges[::2], edges[1::2]
+    keep = (ends - starts) >= min_length
+
+    # Cumulative +1/-1 markers turn the kept runs back into a mask; runs never overlap, so
+    # the running count is 0 or 1 and fits int8 (cumsum would otherwise widen to int64)
+    markers = np.zeros(padded.size, dtype=np.int8)
+    np.add.at(markers, starts[keep] + 1, 1)
+    np.add.at(markers, ends[keep] + 1, -1)
+    in_run = np.cumsum(markers, dtype=np.int8, out=markers).reshape(n_cols, n + 2)[:, 1:-1]
+    return in_run.T > 0
+
+
+def assess_signal_quality(df, k=1.5, flat_min_samples=25, clip_min_samples=3, gap_factor=1.5):
+    """
+    Compute signal quality metrics of one loaded recording in a single pass over its array.
+
+    Parameters
+    ----------
+    df : DataFrame
+        Recording as returned by ``load_accelerometer_data``
+    k : float
+        IQR multiplier, as in ``iqr_artifact_removal``
+    flat_min_samples : int
+        Minimum number of identical consecutive samples counted as a flat segment
+    clip_min_samples : int
+        Minimum number of consecutive samples at an axis extreme counted as clipping
+    gap_factor : float
+        A sampling interval longer than ``gap_factor`` times the median counts as a gap
+
+    Returns
+    -------
+    quality : dict
+        clipping_ratio, flat_fraction (worst axis), gap_count, jitter (interval CV),
+        magnitude_discrepancy (RMS of atotal - |a| over RMS of atotal),
+        artifacts_percent (``iqr_artifact_removal`` on atotal) and quality_score in [0, 1]
+    """
+    values = df[QUALITY_COLUMNS].to_numpy(dtype=float)
+    time, axes = values[:, 0], values[:, 1:]
+
+    dt = np.diff(time)
+    median_dt = np.median(dt)
+    gap_count = int((dt > gap_factor * median_dt).sum())
+    jitter = float(dt.std() / median_dt)
+
+    # Saturation: runs of samples pinned at an axis minimum or maximum
+    at_extreme = (axes == axes.max(axis=0)) | (axes == axes.min(axis=0))
+    clipped = _run_mask(at_extreme, clip_min_samples)
+    clipping_ratio = float(clipped.any(axis=1).mean())
+
+    # Flat-lined axes: long runs of identical consecutive values
+    same = axes[1:] == axes[:-1]
+    unchanged = np.zeros_like(at_extreme)
+    unchanged[1:] = same
+    unchanged[:-1] |= same
+    flat_fraction = float(_run_mask(unchanged, flat_min_samples).mean(axis=0).max())
+
+    atotal = axes[:, 3]
+    magnitude = np.sqrt(np.einsum('ij,ij->i', axes[:, :3], axes[:, :3]))
+    atotal_rms = np.sqrt(np.mean(atotal ** 2))
+    magnitude_discrepancy = float(np.sqrt(np.mean((atotal - magnitude) ** 2)) / atotal_rms) if atotal_rms > 0 else 1.0
+
+    # Same bounds as iqr_artifact_removal; the mean offset removed there does not change the mask
+    q1, q3 = np.percentile(atotal, [25, 75])
+    iqr = q3 - q1
+    artifacts_percent = float(100 * np.mean((atotal < q1 - k * iqr) | (atotal > q3 + k * iqr)))
+
+    quality = {
+        'clipping_ratio': clipping_ratio,
+        'flat_fraction': flat_fraction,
+        'gap_count': gap_count,
+        'jitter': jitter,
+        'magnitude_discrepancy': magnitude_discrepancy,
+        'artifacts_percent': artifacts_percent,
+    }
+    quality['quality_score'] = compute_quality_score(quality)
+    return quality
+
+
+def compute_quality_score(quality, limits=None):
+    """Combine quality metrics into one score in [0, 1]; any metric at its limit gives 0."""
+    limits = limits or QUALITY_LIMITS
+    score = 1.0
+    for metric, limit in limits.items():
+        score *= float(np.clip(1 - quality[metric] / limit, 0, 1))
+    return score
+
+
+def filter_by_quality(df, min_score=0.5):
+    """
+    Drop recordings whose ``quality_score`` is below ``min_score``.
+
+    Pairs with a dropped recording are then excluded by ``perform_paired_ttest``,
+    which only compares subjects having both conditions.
+    """
+    return df[df['quality_score'] >= min_score].reset_index(drop=True)
+
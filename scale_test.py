@@ -0,0 +1,140 @@
+import multiprocessing
+import os
+import resource
+import shutil
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from data_processing_workflow import analyze_all_subjects
+from synthetic_cohort import generate_cohort
+
+
+def check_against_ground_truth(results_df, truth_df, ttest_results, freq_tolerance=1.0):
+    """
+    Compare workflow output with the generator's ground truth.
+
+    Returns
+    -------
+    checks : dict
+        Peak frequency error, fraction of recordings within ``freq_tolerance``,
+        fraction of subjects whose postural band power moves in the true direction,
+        and whether the primary paired test detects the true effect
+    """
+    merged = results_df.merge(truth_df, on=['subject', 'condition'], how='inner')
+    freq_error = (merged['peak_frequency'] - merged['tremor_freq']).abs()
+
+    power = merged.pivot(index='subject', columns='condition', values='band_power_8_12')
+    effect = truth_df[truth_df['condition'] == 'fat_post'].set_index('subject')['fatigue_effect']
+    observed_direction = np.sign(power['fat_post'] - power['post'])
+    true_direction = np.sign(np.log(effect.reindex(power.index)))
+    direction_agreement = float((observed_direction == true_direction).mean())
+
+    primary = ttest_results.get('postural_8_12hz')
+    expect_effect = bool((effect != 1).any())
+    detected = primary is not None and bool(primary['significant'])
+
+    return {
+        'recordings_matched': len(merged),
+        'recordings_expected': len(truth_df),
+        'median_freq_error_hz': float(freq_error.median()),
+        'freq_within_tolerance': float((freq_error <= freq_tolerance).mean()),
+        'direction_agreement': direction_agreement,
+        'primary_test_correct': detected == expect_effect
+    }
+
+
+def _measure_analysis(analyze, subjects, data_dir, trace_memory):
+    """
+    Subprocess body of ``run_scale_test``: time one analysis and measure its memory.
+
+    ``ru_maxrss`` is a lifetime peak, so it is read before and after the call in a
+    process that did nothing else; the difference is the memory the analysis added.
+    """
+    baseline_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    start = time.perf_counter()
+    results_df, ttest_results = analyze(subjects, data_dir, plot_results=False)
+    elapsed = time.perf_counter() - start
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+    peak_traced = np.nan
+    if trace_memory:
+        tracemalloc.start()
+        analyze(subjects, data_dir, plot_results=False)
+        _, peak_traced = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return results_df, ttest_results, elapsed, peak_rss, peak_rss - baseline_rss, peak_traced
+
+
+def run_scale_test(cohort_sizes=(10, 100, 1000), output_dir=None, seed=0, keep_data=False,
+                   analyze=analyze_all_subjects, trace_memory=False, **generator_params):
+    """
+    Run the cohort workflow on synthetic cohorts of increasing size.
+
+    For each size a fresh cohort is generated, ``analyze(subjects, data_dir, plot_results=False)``
+    is timed, and its output is checked against the ground truth. ``analyze`` defaults to
+    ``analyze_all_subjects`` and can be swapped for any module-level function with the
+    same signature and ``(results_df, ttest_results)`` return value.
+
+    Each analysis runs in a freshly spawned process, so ``max_rss_mb`` is the peak of
+    that run alone (interpreter and imports included) and ``rss_increase_mb`` the part
+    added by the analysis, without cohort generation or earlier sizes. ``trace_memory``
+    adds a second, traced run for ``peak_traced_mb`` (NaN otherwise); it is off by
+    default because ``tracemalloc`` slows the workflow down by more than 2x, and the
+    timed run is never traced.
+
+    Returns
+    -------
+    report : DataFrame
+        One row per cohort size with throughput, memory and correctness columns
+    """
+    base_dir = output_dir or tempfile.mkdtemp(prefix='tremor_scale_')
+    rows = []
+    context = multiprocessing.get_context('spawn')
+
+    for n_subjects in cohort_sizes:
+        data_dir = os.path.join(base_dir, f'cohort_{n_subjects}', '')
+        subjects, truth_df = generate_cohort(data_dir, n_subjects, seed=seed, **generator_params)
+
+        with context.Pool(1) as pool:
+            results_df, ttest_results, elapsed, peak_rss, rss_increase, peak_traced = pool.apply(
+                _measure_analysis, (analyze, subjects, data_dir, trace_memory))
+
+        row = {
+            'n_subjects': n_subjects,
+            'n_recordings': len(truth_df),
+            'seconds': elapsed,
+            'recordings_per_second': len(truth_df) / elapsed,
+            'peak_traced_mb': peak_traced / 1e6,
+            'max_rss_mb': peak_rss,
+            'rss_increase_mb': rss_increase,
+        }
+        row.update(check_against_ground_truth(results_df, truth_df, ttest_results))
+        rows.append(row)
+        print_scale_row(row)
+
+        if not keep_data:
+            shutil.rmtree(data_dir)
+
+    if not keep_data and output_dir is None:
+        shutil.rmtree(base_dir, ignore_errors=True)
+
+    return pd.DataFrame(rows)
+
+
+def print_scale_row(row):
+    """Print one line of the scale test report."""
+    print(f"N={row['n_subjects']:<6} {row['n_recordings']:>6} rec  {row['seconds']:8.2f} s  "
+          f"{row['recordings_per_second']:7.1f} rec/s  peak {row['peak_traced_mb']:8.1f} MB  "
+          f"rss {row['max_rss_mb']:8.1f} MB (+{row['rss_increase_mb']:.1f})  "
+          f"freq ok {row['freq_within_tolerance'] * 100:5.1f}%  "
+          f"direction ok {row['direction_agreement'] * 100:5.1f}%  "
+          f"test {'OK' if row['primary_test_correct'] else 'WRONG'}")
+
+
+if __name__ == "__main__":
+    report = run_scale_test(cohort_sizes=(10, 100, 1000))
+    report.to_csv('.//results//scale_test.csv', index=False)
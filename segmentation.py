@@ -0,0 +1,256 @@
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from scipy.fft import rfft, rfftfreq
+
+from helper import extract_signal, get_sampling_rate, load_accelerometer_data
+from processing import extract_tremor_features
+
+EPOCH_LABELS = ['rest', 'postural', 'movement']
+EPOCH_CONDITIONS = {'rest': 'rest', 'postural': 'post'}
+
+
+def _otsu_threshold(values, n_bins=64):
+    """Threshold that best separates ``values`` into two classes (Otsu's method on a histogram)."""
+    counts, edges = np.histogram(values, bins=n_bins)
+    centers = (edges[:-1] + edges[1:]) / 2
+    weight_low = np.cumsum(counts)
+    weight_high = weight_low[-1] - weight_low
+    sum_low = np.cumsum(counts * centers)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean_low = sum_low / weight_low
+        mean_high = (sum_low[-1] - sum_low) / weight_high
+        between = weight_low * weight_high * (mean_low - mean_high) ** 2
+    return edges[1:][np.nanargmax(between)]
+
+
+def compute_frame_features(data, fs, frame_seconds=2.0, hop_seconds=0.5, tremor_band=(3.0, 20.0),
+                           movement_band=(0.2, 3.0)):
+    """
+    Short-time energy and spectral features of a long signal, all frames at once.
+
+    Frames are strided views of the signal, so the cost is one FFT per frame: linear in
+    the recording length for a fixed frame size.
+
+    Returns
+    -------
+    frame_starts : array
+        Sample index where each frame starts
+    tremor_rms : array
+        RMS of the tremor band per frame (from the frame spectrum)
+    movement_fraction : array
+        Share of frame power in the slow voluntary-movement band
+    spectral_flux : array
+        Distance between consecutive normalised log spectra (0 for the first frame)
+    """
+    frame_len = int(round(frame_seconds * fs))
+    hop = max(int(round(hop_seconds * fs)), 1)
+    frames = sliding_window_view(data, frame_len)[::hop]
+    frame_starts = np.arange(len(frames)) * hop
+
+    window = np.hanning(frame_len)
+    centred = frames - frames.mean(axis=1, keepdims=True)
+    power = np.abs(rfft(centred * window, axis=1)) ** 2
+    freqs = rfftfreq(frame_len, 1 / fs)
+    # Parseval scaling of the windowed spectrum back to mean-square amplitude
+    power *= 2 / (frame_len * (window ** 2).sum())
+
+    in_tremor = (freqs >= tremor_band[0]) & (freqs <= tremor_band[1])
+    in_movement = (freqs >= movement_band[0]) & (freqs < movement_band[1])
+    total = power[:, 1:].sum(axis=1) + 1e-20
+    tremor_rms = np.sqrt(power[:, in_tremor].sum(axis=1))
+    movement_fraction = power[:, in_movement].sum(axis=1) / total
+
+    log_spectrum = np.log(power[:, 1:] / total[:, None] + 1e-12)
+    spectral_flux = np.zeros(len(frames))
+    spectral_flux[1:] = np.sqrt(np.mean(np.diff(log_spectrum, axis=0) ** 2, axis=1))
+
+    return frame_starts, tremor_rms, movement_fraction, spectral_flux
+
+
+def _merge_short_runs(labels, min_frames):
+    """
+    Relabel runs shorter than ``min_frames`` with the label of the longer adjacent long run.
+
+    Works on the run-length encoding in one vectorized pass: every short run (or cluster
+    of consecutive short runs, i.e. label flicker) takes the label of the nearest long
+    run on the side where that run is longer. Linear in the number of frames.
+    """
+    change = np.flatnonzero(np.diff(labels)) + 1
+    starts = np.concatenate(([0], change))
+    lengths = np.diff(np.concatenate((starts, [len(labels)])))
+    run_labels = labels[starts]
+    is_long = lengths >= min_frames
+    if is_long.all():
+        return labels
+    if not is_long.any():
+        # Nothing stable to merge into: use the label covering most frames
+        return np.full_like(labels, np.argmax(np.bincount(run_labels, weights=lengths)))
+
+    index = np.arange(len(lengths))
+    left = np.maximum.accumulate(np.where(is_long, index, -1))
+    right = np.minimum.accumulate(np.where(is_long, index, len(lengths))[::-1])[::-1]
+    has_left, has_right = left >= 0, right < len(lengths)
+    left_length = np.where(has_left, lengths[np.maximum(left, 0)], -1)
+    right_length = np.where(has_right, lengths[np.minimum(right, len(lengths) - 1)], -1)
+    source = np.where(left_length >= right_length, left, right)
+    return np.repeat(run_labels[source], lengths)
+
+
+def segment_recording(data, fs, frame_seconds=2.0, hop_seconds=0.5, movement_threshold=0.5,
+                      min_epoch_seconds=5.0, boundary_search_seconds=1.0):
+    """
+    Split a continuous recording into rest, postural and movement epochs.
+
+    Frames dominated by slow (< 3 Hz) power are movement or transitions. The remaining
+    frames are split into rest and postural by an Otsu threshold on log tremor-band RMS,
+    since holding a posture raises tremor amplitude well above rest. Runs shorter than
+    ``min_epoch_seconds`` are absorbed by their neighbours, and each epoch boundary is
+    moved to the spectral-flux peak (the largest change in spectral shape) nearby.
+
+    Parameters
+    ----------
+    data : array
+        Continuous signal, e.g. ``atotal``
+    fs : float
+        Sampling frequency
+    frame_seconds, hop_seconds : float
+        Analysis frame length and hop
+    movement_threshold : float
+        Minimum share of slow-band power that marks a frame as movement
+    min_epoch_seconds : float
+        Shortest epoch kept as a separate segment
+    boundary_search_seconds : float
+        How far a boundary may move towards a spectral-flux peak
+
+    Returns
+    -------
+    epochs : list of dict
+        label, start (sample index, inclusive) and end (exclusive), in time order
+    """
+    data = np.asarray(data, dtype=float)
+    frame_len = int(round(frame_seconds * fs))
+    if len(data) < frame_len:
+        return [{'label': 'movement', 'start': 0, 'end': len(data)}]
+
+    frame_starts, tremor_rms, movement_fraction, spectral_flux = compute_frame_features(
+        data, fs, frame_seconds, hop_seconds)
+    hop = frame_starts[1] - frame_starts[0] if len(frame_starts) > 1 else frame_len
+
+    labels = np.full(len(frame_starts), EPOCH_LABELS.index('movement'))
+    still = movement_fraction < movement_threshold
+    if still.sum() >= 2:
+        log_rms = np.log(tremor_rms[still] + 1e-12)
+        threshold = _otsu_threshold(log_rms)
+        labels[still] = np.where(log_rms > threshold, EPOCH_LABELS.index('postural'), EPOCH_LABELS.index('rest'))
+
+    min_frames = max(int(round(min_epoch_seconds / (hop / fs))), 1)
+    labels = _merge_short_runs(labels, min_frames)
+
+    # Frame centres map frames back to samples; boundaries snap to nearby flux peaks
+    change = np.flatnonzero(np.diff(labels)) + 1
+    search = int(round(boundary_search_seconds * fs / hop))
+    boundaries = []
+    for frame in change:
+        lo, hi = max(frame - search, 1), min(frame + search + 1, len(labels))
+        peak = lo + int(np.argmax(spectral_flux[lo:hi]))
+        boundaries.append(int(frame_starts[peak] + frame_len // 2))
+
+    starts = [0] + boundaries
+    ends = boundaries + [len(data)]
+    run_labels = labels[np.concatenate(([0], change))]
+    return [{'label': EPOCH_LABELS[label], 'start': start, 'end': end}
+            for label, start, end in zip(run_labels, starts, ends) if end > start]
+
+
+def extract_epoch_features(data, fs, epochs, trim_seconds=1.0, min_duration=10.0, **feature_params):
+    """
+    Run ``extract_tremor_features`` on every rest and postural epoch as if it were its own file.
+
+    ``trim_seconds`` is cut from both ends of each epoch (the manual trimming of the
+    four-file protocol); epochs shorter than ``min_duration`` after trimming are skipped.
+
+    Returns
+    -------
+    rows : list of dict
+        Features per epoch with its label, condition name and start/end times in seconds
+    """
+    trim = int(round(trim_seconds * fs))
+    rows = []
+    for index, epoch in enumerate(epochs):
+        if epoch['label'] not in EPOCH_CONDITIONS:
+            continue
+        start, end = epoch['start'] + trim, epoch['end'] - trim
+        if (end - start) / fs < min_duration:
+            continue
+        features = extract_tremor_features(data[start:end], fs, **feature_params)[0]
+        row = {
+            'epoch': index,
+            'label': epoch['label'],
+            'condition': EPOCH_CONDITIONS[epoch['label']],
+            'start_time': start / fs,
+            'end_time': end / fs,
+            'duration': (end - start) / fs
+        }
+        row.update(features)
+        rows.append(row)
+    return rows
+
+
+def aggregate_epoch_rows(rows):
+    """
+    Combine the epoch rows of each condition into one row per condition.
+
+    Features are averaged weighted by epoch duration, so a long, stable epoch counts more
+    than a short one and the result approximates analysing the concatenated epochs.
+    ``duration`` becomes the total and ``n_epochs`` counts the epochs; per-epoch fields
+    (index, label, start and end times) are dropped.
+    """
+    per_epoch = {'epoch', 'label', 'condition', 'start_time', 'end_time', 'duration'}
+    combined = {}
+    for condition in dict.fromkeys(row['condition'] for row in rows):
+        group = [row for row in rows if row['condition'] == condition]
+        durations = np.array([row['duration'] for row in group])
+        row = {'condition': condition}
+        for name, value in group[0].items():
+            if name not in per_epoch and isinstance(value, (int, float, np.number)):
+                row[name] = float(np.average([r[name] for r in group], weights=durations))
+        row['duration'] = float(durations.sum())
+        row['n_epochs'] = len(group)
+        combined[condition] = row
+    return list(combined.values())
+
+
+def analyze_session(filepath, subject_name, fatigued=False, axis='atotal', **segment_params):
+    """
+    Segment one continuous session recording and extract features per condition.
+
+    Rest and postural epochs get the conditions ``rest``/``post`` (or ``fat_rest``/``fat_post``
+    for a post-fatigue session). A session usually contains several epochs of each task;
+    they are combined by ``aggregate_epoch_rows`` (duration-weighted mean), so each
+    condition yields exactly one row and the rows can join the cohort table used by
+    ``perform_paired_ttest``, which expects one recording per subject and condition.
+
+    Returns
+    -------
+    epochs : list of dict
+        Output of ``segment_recording``
+    rows : list of dict
+        One feature row per condition found in the session
+    """
+    df = load_accelerometer_data(filepath)
+    fs = get_sampling_rate(df)
+    signal_data, _ = extract_signal(df, axis)
+
+    epochs = segment_recording(signal_data, fs, **segment_params)
+    epoch_rows = extract_epoch_features(
+        signal_data, fs, epochs,
+        artifact_params={'k': 1.5},
+        denoise_params={'window_size': 51, 'threshold_scale': 0.5, 'blend_factor': 0.3}
+    )
+    rows = aggregate_epoch_rows(epoch_rows)
+    for row in rows:
+        row['subject'] = subject_name
+        if fatigued:
+            row['condition'] = 'fat_' + row['condition']
+        row['fs'] = fs
+    return epochs, rows
@@ -111,4 +111,177 @@ def perform_paired_ttest(df):
                 'significant': p_value < 0.05
             }
 
-    return results
\ No newline at end of file
+    return results
+
+PAIRED_TESTS = {
+    'postural_8_12hz': ('Postural: Post-Fatigue vs Baseline', 'band_power_8_12', 'post', 'fat_post'),
+    'rest_8_12hz': ('Rest: Post-Fatigue vs Baseline', 'band_power_8_12', 'rest', 'fat_rest'),
+    'postural_rms': ('Postural: Post-Fatigue vs Baseline', 'rms', 'post', 'fat_post'),
+}
+
+
+class PairedTTestAccumulator:
+    """
+    Running paired t-test over (baseline, fatigue) pairs using Welford updates.
+
+    Holds only counts, means and sums of squared deviations, so memory does not grow
+    with the number of subjects. ``result()`` returns the same fields as one entry
+    of ``perform_paired_ttest``.
+    """
+
+    def __init__(self, comparison, feature):
+        self.comparison = comparison
+        self.feature = feature
+        self.n = 0
+        self.mean = np.zeros(3)  # baseline, fatigue, difference
+        self.m2 = np.zeros(3)
+
+    def update(self, baseline, fatigue):
+        x = np.array([baseline, fatigue, fatigue - baseline], dtype=float)
+        self.n += 1
+        delta = x - self.mean
+        self.mean += delta / self.n
+        self.m2 += delta * (x - self.mean)
+
+    def result(self):
+        if self.n < 2:
+            return None
+        baseline_mean, fatigue_mean, mean_diff = self.mean
+        baseline_std, fatigue_std, _ = np.sqrt(self.m2 / self.n)
+        diff_sem = np.sqrt(self.m2[2] / (self.n - 1) / self.n)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            t_stat = mean_diff / diff_sem
+        p_value = 2 * stats.t.sf(abs(t_stat), self.n - 1)
+        return {
+            'comparison': self.comparison,
+            'feature': self.feature,
+            'n_subjects': self.n,
+            'baseline_mean': baseline_mean,
+            'baseline_std': baseline_std,
+            'fatigue_mean': fatigue_mean,
+            'fatigue_std': fatigue_std,
+            'mean_diff': mean_diff,
+            'percent_change': (mean_diff / baseline_mean) * 100,
+            't_statistic': t_stat,
+            'p_value': p_value,
+            'cohens_d': mean_diff / baseline_std if baseline_std > 0 else 0,
+            'significant': p_value < 0.05
+        }
+
+
+def perform_streaming_paired_ttest(records):
+    """
+    Paired t-tests over a stream of per-recording feature records.
+
+    Records must arrive grouped by subject (as ``iter_cohort_features`` yields them): only
+    the current subject's records are held, and they are dropped as soon as the stream
+    moves on to the next subject, so memory stays constant even when subjects are
+    missing recordings. Results match ``perform_paired_ttest`` on the same records
+    collected into a DataFrame.
+    """
+    accumulators = {key: PairedTTestAccumulator(comparison, feature)
+                    for key, (comparison, feature, _, _) in PAIRED_TESTS.items()}
+    current_subject = None
+    subject_records = {}
+
+    for record in records:
+        if record['subject'] != current_subject:
+            current_subject = record['subject']
+            subject_records = {}
+        subject_records[record['condition']] = record
+        for key, (_, feature, baseline_cond, fatigue_cond) in PAIRED_TESTS.items():
+            if record['condition'] in (baseline_cond, fatigue_cond) \
+                    and baseline_cond in subject_records and fatigue_cond in subject_records:
+                accumulators[key].update(subject_records[baseline_cond][feature],
+                                         subject_records[fatigue_cond][feature])
+
+    results = {}
+    for key, accumulator in accumulators.items():
+        result = accumulator.result()
+        if result is not None:
+            results[key] = result
+    return results
+
+
+def perform_weighted_paired_ttest(df, se_suffix='_se'):
+    """
+    Paired comparisons weighted by the per-recording uncertainty of each feature.
+
+    Each subject's difference ``d_i`` has variance ``v_i = se_baseline^2 + se_fatigue^2``
+    from the ``<feature>_se`` columns. Subjects are weighted by ``1 / (v_i + tau^2)``, where
+    the between-subject variance ``tau^2`` is estimated by DerSimonian-Laird, so noisy
+    recordings count less without letting precise ones hide real between-subject
+    spread. Tests whose feature has no standard-error column (e.g. ``rms``) fall back to
+    the unweighted ``perform_paired_ttest`` result, marked ``weighted: False``, so both
+    paths return the same set of tests.
+
+    Returns
+    -------
+    results : dict
+        Same fields as ``perform_paired_ttest`` (means are weighted), plus ``tau2`` and
+        ``weighted``
+    """
+    results = {}
+    unweighted = None
+    for key, (comparison, feature, baseline_cond, fatigue_cond) in PAIRED_TESTS.items():
+        se_column = feature + se_suffix
+        if se_column not in df.columns:
+            if unweighted is None:
+                unweighted = perform_paired_ttest(df)
+            if key in unweighted:
+                results[key] = dict(unweighted[key], tau2=np.nan, weighted=False)
+            continue
+        baseline = df[df['condition'] == baseline_cond].drop_duplicates('subject').set_index('subject')
+        fatigue = df[df['condition'] == fatigue_cond].drop_duplicates('subject').set_index('subject')
+        common = baseline.index.intersection(fatigue.index).sort_values()
+        n = len(common)
+        if n < 2:
+            continue
+
+        baseline_values = baseline.loc[common, feature].to_numpy(dtype=float)
+        fatigue_values = fatigue.loc[common, feature].to_numpy(dtype=float)
+        diff = fatigue_values - baseline_values
+        variance = (baseline.loc[common, se_column].to_numpy(dtype=float) ** 2
+                    + fatigue.loc[common, se_column].to_numpy(dtype=float) ** 2)
+
+        if np.all(np.isfinite(variance) & (variance > 0)):
+            w = 1 / variance
+            fixed_mean = np.sum(w * diff) / np.sum(w)
+            q = np.sum(w * (diff - fixed_mean) ** 2)
+            tau2 = max(0.0, (q - (n - 1)) / (np.sum(w) - np.sum(w ** 2) / np.sum(w)))
+            w = 1 / (variance + tau2)
+        else:
+            # Without usable standard errors fall back to equal weights
+            tau2 = np.nan
+            w = np.ones(n)
+
+        w = w / np.sum(w)
+        mean_diff = np.sum(w * diff)
+        if np.isnan(tau2):
+            diff_sem = np.std(diff, ddof=1) / np.sqrt(n)
+        else:
+            diff_sem = np.sqrt(1 / np.sum(1 / (variance + tau2)))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            t_stat = mean_diff / diff_sem
+        p_value = 2 * stats.t.sf(abs(t_stat), n - 1)
+
+        baseline_mean = np.sum(w * baseline_values)
+        baseline_std = np.std(baseline_values)
+        results[key] = {
+            'comparison': comparison,
+            'feature': feature,
+            'n_subjects': n,
+            'baseline_mean': baseline_mean,
+            'baseline_std': baseline_std,
+            'fatigue_mean': np.sum(w * fatigue_values),
+            'fatigue_std': np.std(fatigue_values),
+            'mean_diff': mean_diff,
+            'percent_change': (mean_diff / baseline_mean) * 100,
+            't_statistic': t_stat,
+            'p_value': p_value,
+            'cohens_d': mean_diff / baseline_std if baseline_std > 0 else 0,
+            'significant': p_value < 0.05,
+            'tau2': tau2,
+            'weighted': True
+        }
+    return results
@@ -0,0 +1,151 @@
+import csv
+import json
+import os
+
+import numpy as np
+
+from data_processing_workflow import analyze_condition, get_condition_files
+from processing import PipelineWorkspace
+from statistic_test import perform_streaming_paired_ttest
+
+
+class CsvFeatureSink:
+    """Append feature records to a CSV file as they arrive, one row per recording."""
+
+    def __init__(self, path, append=False):
+        self.path = path
+        resume = append and os.path.exists(path) and os.path.getsize(path) > 0
+        self._file = open(path, 'a' if resume else 'w', newline='')
+        self._writer = None
+        if resume:
+            with open(path, newline='') as f:
+                self._fieldnames = next(csv.reader(f))
+        else:
+            self._fieldnames = None
+
+    def write(self, record):
+        if self._writer is None:
+            if self._fieldnames is None:
+                self._fieldnames = list(record)
+                self._writer = csv.DictWriter(self._file, fieldnames=self._fieldnames, extrasaction='ignore')
+                self._writer.writeheader()
+            else:
+                self._writer = csv.DictWriter(self._file, fieldnames=self._fieldnames, extrasaction='ignore')
+        self._writer.writerow(record)
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class BinaryFeatureSink:
+    """
+    Append feature records to a flat binary file of fixed-size structured rows.
+
+    The record layout is fixed by the first record (strings become fixed-width unicode,
+    everything else float64) and stored in a ``<path>.json`` sidecar, so the file can be
+    memory-mapped or read back with ``read_binary_features`` without parsing text.
+    """
+
+    def __init__(self, path, string_width=64):
+        self.path = path
+        self.string_width = string_width
+        self._file = open(path, 'wb')
+        self._dtype = None
+
+    def write(self, record):
+        if self._dtype is None:
+            self._dtype = np.dtype([(name, f'U{self.string_width}' if isinstance(value, str) else 'f8')
+                                    for name, value in record.items()])
+            with open(self.path + '.json', 'w') as f:
+                json.dump(self._dtype.descr, f)
+        row = np.array([tuple(record[name] for name in self._dtype.names)], dtype=self._dtype)
+        row.tofile(self._file)
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def read_binary_features(path, mmap=True):
+    """Read records written by ``BinaryFeatureSink`` as a structured array."""
+    with open(path + '.json') as f:
+        dtype = np.dtype([tuple(field) for field in json.load(f)])
+    if mmap:
+        if os.path.getsize(path) == 0:
+            return np.zeros(0, dtype=dtype)
+        return np.memmap(path, dtype=dtype, mode='r')
+    return np.fromfile(path, dtype=dtype)
+
+
+def iter_cohort_features(subjects, data_dir, sinks=(), workspace=None):
+    """
+    Yield one feature record per recording as soon as it has been processed.
+
+    Signals, spectra and earlier records are not retained, so memory stays flat in the
+    number of subjects. Each record is also written to every sink in ``sinks`` before
+    it is yielded. Recordings that fail are reported and skipped. A ``PipelineWorkspace``
+    is reused for every recording when given.
+    """
+    for subject in subjects:
+        for condition, filepath in get_condition_files(subject, data_dir).items():
+            try:
+                record = analyze_condition(subject, condition, filepath, workspace)[0]
+            except Exception as e:
+                print(f"Error processing {subject} {condition}: {e}")
+                continue
+            for sink in sinks:
+                sink.write(record)
+            yield record
+
+
+def analyze_cohort_streaming(subjects, data_dir, csv_path=None, binary_path=None, dtype=None):
+    """
+    Streaming counterpart of ``analyze_all_subjects``.
+
+    Records go straight from feature extraction into the optional CSV/binary sinks and the
+    running paired t-tests; no cohort-sized DataFrame is built. With ``dtype`` set
+    (``np.float64`` or ``np.float32``) preprocessing runs in one reused ``PipelineWorkspace``.
+
+    Returns
+    -------
+    n_records : int
+        Number of recordings processed
+    ttest_results : dict
+        Same structure as ``perform_paired_ttest``
+    """
+    sinks = []
+    if csv_path is not None:
+        sinks.append(CsvFeatureSink(csv_path))
+    if binary_path is not None:
+        sinks.append(BinaryFeatureSink(binary_path))
+
+    workspace = PipelineWorkspace(dtype) if dtype is not None else None
+    n_records = 0
+
+    def counted(records):
+        nonlocal n_records
+        for record in records:
+            n_records += 1
+            yield record
+
+    try:
+        records = counted(iter_cohort_features(subjects, data_dir, sinks, workspace))
+        ttest_results = perform_streaming_paired_ttest(records)
+    finally:
+        for sink in sinks:
+            sink.close()
+
+    return n_records, ttest_results
@@ -0,0 +1,144 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+CONDITION_FILES = {
+    'rest': 'rest',
+    'post': 'post',
+    'fat_rest': 'fat rest',
+    'fat_post': 'fat post'
+}
+
+
+def generate_recording(rng, duration=20.0, fs=100.0, tremor_freq=10.0, tremor_amp=0.05,
+                       noise_std=0.02, artifact_rate=0.0, artifact_amp=1.0, jitter_std=0.0005,
+                       bias=(0.0, 0.0, 0.075), decimals=2):
+    """
+    Generate one synthetic recording in the ``time,ax,ay,az,atotal`` layout.
+
+    The tremor is a slowly amplitude- and frequency-modulated sinusoid along a random
+    direction close to the phone z-axis, on top of a constant sensor bias. ``atotal`` is
+    the vector magnitude, as in the phone exports; keeping ``tremor_amp`` below the bias
+    magnitude keeps the tremor fundamental (and not its rectified harmonic) dominant.
+
+    Parameters
+    ----------
+    rng : numpy.random.Generator
+        Random source
+    duration : float
+        Recording length in seconds
+    fs : float
+        Nominal sampling frequency
+    tremor_freq : float
+        Centre tremor frequency in Hz
+    tremor_amp : float
+        Tremor amplitude in m/s²
+    noise_std : float
+        Standard deviation of white sensor noise per axis
+    artifact_rate : float
+        Expected number of movement artifacts (short spikes) per second
+    artifact_amp : float
+        Typical artifact amplitude in m/s²
+    jitter_std : float
+        Standard deviation of the sampling interval in seconds
+    bias : tuple
+        Constant offset of each axis in m/s²
+    decimals : int
+        Rounding of the exported values, matching the phone app resolution
+
+    Returns
+    -------
+    df : DataFrame
+        Recording with columns time, ax, ay, az, atotal
+    """
+    n = int(round(duration * fs))
+    dt = np.clip(1 / fs + rng.normal(0, jitter_std, n - 1), 0.2 / fs, None)
+    time = np.concatenate(([0.0], np.cumsum(dt)))
+
+    # Slow random-walk drifts in tremor amplitude and frequency
+    drift = np.cumsum(rng.normal(0, 1, (2, n)), axis=1) / np.sqrt(n)
+    amplitude = tremor_amp * (1 + 0.2 * drift[0])
+    phase = 2 * np.pi * np.cumsum(np.diff(time, prepend=0) * tremor_freq * (1 + 0.03 * drift[1]))
+    tremor = amplitude * np.sin(phase + rng.uniform(0, 2 * np.pi))
+
+    direction = np.array([rng.normal(0, 0.3), rng.normal(0, 0.3), 1.0])
+    direction /= np.linalg.norm(direction)
+
+    axes = np.asarray(bias)[:, None] + direction[:, None] * tremor + rng.normal(0, noise_std, (3, n))
+
+    n_artifacts = rng.poisson(artifact_rate * duration)
+    if n_artifacts:
+        starts = rng.integers(0, n - 5, n_artifacts)
+        spikes = rng.normal(0, artifact_amp, (3, n_artifacts))
+        for offset in range(5):
+            axes[:, starts + offset] += spikes * np.exp(-offset)
+
+    atotal = np.sqrt((axes ** 2).sum(axis=0))
+    return pd.DataFrame({
+        'time': time.round(3),
+        'ax': axes[0].round(decimals),
+        'ay': axes[1].round(decimals),
+        'az': axes[2].round(decimals),
+        'atotal': atotal.round(decimals)
+    })
+
+
+def generate_cohort(output_dir, n_subjects, seed=0, duration=20.0, fs=100.0,
+                    tremor_freq=(10.0, 1.0), rest_amp=(0.02, 0.005), post_amp=(0.05, 0.01),
+                    fatigue_effect=1.3, noise_std=0.02, artifact_rate=0.05, artifact_amp=1.0,
+                    jitter_std=0.0005):
+    """
+    Write a synthetic cohort to ``output_dir`` using the ``<Subject> [fat ](rest|post).csv`` naming.
+
+    Each subject gets its own tremor frequency and amplitudes drawn from ``(mean, std)``
+    pairs; the fatigued conditions multiply the tremor amplitude by ``fatigue_effect``
+    (so band power scales by its square). The per-recording ground truth is written to
+    ``ground_truth.csv`` next to the recordings.
+
+    Returns
+    -------
+    subjects : list
+        Subject names, in the form expected by ``analyze_all_subjects``
+    truth_df : DataFrame
+        Ground truth: subject, condition, tremor_freq, tremor_amp, fatigue_effect
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    width = max(4, len(str(n_subjects)))
+
+    subjects = []
+    truth = []
+    for i in range(n_subjects):
+        subject = f"Synth{i:0{width}d}"
+        subjects.append(subject)
+        freq = float(np.clip(rng.normal(*tremor_freq), 8.5, 11.5))
+        base_amp = {
+            'rest': abs(rng.normal(*rest_amp)),
+            'post': abs(rng.normal(*post_amp))
+        }
+
+        for condition, file_label in CONDITION_FILES.items():
+            task = condition.replace('fat_', '')
+            effect = fatigue_effect if condition.startswith('fat_') else 1.0
+            amp = base_amp[task] * effect
+            df = generate_recording(rng, duration=duration, fs=fs, tremor_freq=freq, tremor_amp=amp,
+                                    noise_std=noise_std, artifact_rate=artifact_rate,
+                                    artifact_amp=artifact_amp, jitter_std=jitter_std)
+            df.to_csv(os.path.join(output_dir, f"{subject} {file_label}.csv"), index=False)
+            truth.append({
+                'subject': subject,
+                'condition': condition,
+                'tremor_freq': freq,
+                'tremor_amp': amp,
+                'fatigue_effect': effect
+            })
+
+    truth_df = pd.DataFrame(truth)
+    truth_df.to_csv(os.path.join(output_dir, 'ground_truth.csv'), index=False)
+    return subjects, truth_df
+
+
+if __name__ == "__main__":
+    subjects, truth_df = generate_cohort('.//synthetic_data//', n_subjects=20)
+    print(f"Generated {len(subjects)} subjects ({len(truth_df)} recordings) in .//synthetic_data//")
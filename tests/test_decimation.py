@@ -0,0 +1,92 @@
+import os
+
+import numpy as np
+import pytest
+from scipy import signal
+
+from data_processing_workflow import analyze_condition, discover_subjects, get_condition_files
+from helper import extract_signal, get_sampling_rate, load_accelerometer_data
+from processing import decimation_factor, extract_tremor_features
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', '')
+TARGET_FS = 50
+
+# Largest relative difference allowed between features with and without target_fs
+BAND_TOLERANCES = {
+    'band_power_8_12': 0.02,
+    'band_power_3_8': 0.05,
+    'rms': 0.05,
+    'spectral_entropy': 0.03,
+}
+
+
+def load_recordings():
+    recordings = []
+    for subject in discover_subjects(DATA_DIR):
+        for filepath in get_condition_files(subject, DATA_DIR).values():
+            df = load_accelerometer_data(filepath)
+            data, _ = extract_signal(df, 'atotal')
+            recordings.append((data, get_sampling_rate(df)))
+    return recordings
+
+
+def feature_differences(recordings, upsample=1):
+    """Relative feature differences per recording, and whether the peak frequency matches."""
+    differences = {name: [] for name in BAND_TOLERANCES}
+    peak_matches = []
+    for data, fs in recordings:
+        if upsample > 1:
+            data, fs = signal.resample_poly(data, upsample, 1), fs * upsample
+        params = ({'k': 1.5}, {'window_size': 51 * upsample})
+        full = extract_tremor_features(data, fs, *params)[0]
+        decimated = extract_tremor_features(data, fs, *params, target_fs=TARGET_FS)[0]
+        for name in BAND_TOLERANCES:
+            differences[name].append(abs(decimated[name] - full[name]) / abs(full[name]))
+        peak_matches.append(decimated['peak_frequency'] == full['peak_frequency'])
+    return {name: np.array(values) for name, values in differences.items()}, np.mean(peak_matches)
+
+
+@pytest.fixture(scope='module')
+def recordings():
+    return load_recordings()
+
+
+@pytest.mark.parametrize('fs, expected', [(99.9, 2), (100.54, 2), (95, 2), (75, 1), (200, 4), (500, 8), (40, 1)])
+def test_decimation_factor_tolerates_nominal_rates(fs, expected):
+    assert decimation_factor(fs, TARGET_FS) == expected
+
+
+def test_decimation_factor_without_target():
+    assert decimation_factor(100, None) == 1
+
+
+@pytest.mark.parametrize('target_fs', [20, 0, -50])
+def test_target_rate_below_bandpass_edge_is_rejected(target_fs):
+    data = np.random.default_rng(0).standard_normal(4096)
+    with pytest.raises(ValueError, match='target_fs'):
+        extract_tremor_features(data, 100.0, target_fs=target_fs)
+
+
+def test_analyze_condition_returns_matching_time_axis():
+    subject = discover_subjects(DATA_DIR)[0]
+    condition, filepath = next(iter(get_condition_files(subject, DATA_DIR).items()))
+    _, time, raw, processed, _, _ = analyze_condition(subject, condition, filepath, target_fs=TARGET_FS)
+    full_time = analyze_condition(subject, condition, filepath)[1]
+    assert len(time) == len(raw) == len(processed) < len(full_time)
+    assert time[0] == full_time[0] and np.allclose(np.median(np.diff(time)), 2 * np.median(np.diff(full_time)))
+
+
+def test_decimated_features_match_on_recordings(recordings):
+    differences, peak_match = feature_differences(recordings)
+    for name, tolerance in BAND_TOLERANCES.items():
+        assert differences[name].max() < tolerance, name
+    assert differences['band_power_8_12'].max() < 0.005
+    assert peak_match >= 0.95
+
+
+def test_decimated_features_match_on_high_rate_recording(recordings):
+    # Every recording resampled to ~500 Hz, as from a high-rate sensor, then decimated by 8
+    differences, peak_match = feature_differences(recordings, upsample=5)
+    for name, tolerance in BAND_TOLERANCES.items():
+        assert differences[name].max() < tolerance, name
+    assert peak_match >= 0.85
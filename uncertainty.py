@@ -0,0 +1,102 @@
+import numpy as np
+from scipy import stats
+
+from welch import segment_variance_factor
+
+# Band-power features with a per-recording uncertainty; None means the full spectrum
+UNCERTAINTY_BANDS = {
+    'band_power_8_12': (8, 12),
+    'band_power_3_8': (3, 8),
+    'total_power': None,
+}
+
+
+def band_weights(freqs, band):
+    """Trapezoid weights so that ``psd @ weights`` equals ``compute_band_power(freqs, psd, *band)``."""
+    in_band = np.ones(len(freqs), dtype=bool) if band is None else (freqs >= band[0]) & (freqs <= band[1])
+    idx = np.flatnonzero(in_band)
+    weights = np.zeros(len(freqs))
+    if len(idx) > 1:
+        half_steps = np.diff(freqs[idx]) / 2
+        weights[idx[:-1]] += half_steps
+        weights[idx[1:]] += half_steps
+    return weights
+
+
+def _band_statistics(mean_powers):
+    """Features from mean band powers (last axis in ``UNCERTAINTY_BANDS`` order), plus relative 8-12 Hz power."""
+    band_8_12, total = mean_powers[..., 0], mean_powers[..., 2]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        relative = np.where(total > 0, band_8_12 / total, 0.0)
+    return np.concatenate((mean_powers, relative[..., None]), axis=-1)
+
+
+def band_power_uncertainty(freqs, periodograms, method='jackknife', confidence=0.95, n_boot=1000, rng=None,
+                           nperseg=256, noverlap=None, window='hann'):
+    """
+    Standard errors and confidence intervals of band-power features from Welch segments.
+
+    Each segment gives its own band powers (one matrix product), and the recording's
+    features are their mean, so resampling segments measures how stable the estimate is
+    within a recording. Both the jackknife (leave-one-segment-out means, O(n) per band)
+    and the bootstrap (multinomial resampling counts, one matrix product for all
+    replicates) are vectorized. Standard errors are inflated for the correlation of
+    overlapping segments.
+
+    Parameters
+    ----------
+    freqs : array
+        Frequency axis
+    periodograms : array
+        (n_segments, n_freqs) output of ``welch.welch_segments``
+    method : str
+        'jackknife' (t-based interval) or 'bootstrap' (percentile interval)
+    confidence : float
+        Confidence level of the intervals
+    n_boot : int
+        Bootstrap replicates
+    rng : numpy.random.Generator
+        Random source for the bootstrap
+    nperseg, noverlap, window
+        Welch parameters used for the segments
+
+    Returns
+    -------
+    uncertainty : dict
+        ``<feature>_se``, ``<feature>_ci_low`` and ``<feature>_ci_high`` for every feature in
+        ``UNCERTAINTY_BANDS`` and for ``relative_power_8_12``
+    """
+    names = list(UNCERTAINTY_BANDS) + ['relative_power_8_12']
+    weights = np.column_stack([band_weights(freqs, band) for band in UNCERTAINTY_BANDS.values()])
+    segment_powers = periodograms @ weights
+    n = len(segment_powers)
+
+    if n < 2:
+        estimate = _band_statistics(segment_powers.mean(axis=0))
+        se = low = high = np.full(len(names), np.nan)
+    elif method == 'jackknife':
+        estimate = _band_statistics(segment_powers.mean(axis=0))
+        leave_one_out = _band_statistics((segment_powers.sum(axis=0) - segment_powers) / (n - 1))
+        se = np.sqrt((n - 1) / n * ((leave_one_out - leave_one_out.mean(axis=0)) ** 2).sum(axis=0))
+        se *= np.sqrt(segment_variance_factor(n, nperseg, noverlap, window))
+        margin = stats.t.ppf(0.5 + confidence / 2, n - 1) * se
+        low, high = estimate - margin, estimate + margin
+    elif method == 'bootstrap':
+        rng = rng if rng is not None else np.random.default_rng()
+        estimate = _band_statistics(segment_powers.mean(axis=0))
+        counts = rng.multinomial(n, np.full(n, 1 / n), size=n_boot)
+        replicates = _band_statistics(counts @ segment_powers / n)
+        inflation = np.sqrt(segment_variance_factor(n, nperseg, noverlap, window))
+        # Widen the replicate spread around the estimate by the same overlap correction
+        replicates = estimate + (replicates - estimate) * inflation
+        se = replicates.std(axis=0, ddof=1)
+        low, high = np.percentile(replicates, [50 - 50 * confidence, 50 + 50 * confidence], axis=0)
+    else:
+        raise ValueError(f"Unknown method '{method}' (expected 'jackknife' or 'bootstrap')")
+
+    uncertainty = {}
+    for i, name in enumerate(names):
+        uncertainty[f'{name}_se'] = se[i]
+        uncertainty[f'{name}_ci_low'] = low[i]
+        uncertainty[f'{name}_ci_high'] = high[i]
+    return uncertainty